@@ -0,0 +1,50 @@
+import asyncio
+import threading
+
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """
+    Return the shared background event loop, starting it in a daemon thread on first use.
+    Async clients (OpenAI, Pinecone futures) are bound to this loop, so every coroutine
+    of the async pipeline runs on it.
+    """
+    global _loop
+    if _loop is None:
+        with _loop_lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name="asyncio-loop", daemon=True)
+                thread.start()
+                _loop = loop
+    return _loop
+
+
+def submit_coroutine(coro):
+    """Schedule a coroutine on the background loop and return a concurrent.futures.Future."""
+    return asyncio.run_coroutine_threadsafe(coro, get_event_loop())
+
+
+def run_coroutine(coro, timeout=None):
+    """Run a coroutine on the background loop and block the calling thread until it finishes."""
+    return submit_coroutine(coro).result(timeout)
+
+
+def iterate_async(async_iterator, timeout=None):
+    """
+    Iterate an async iterator on the background loop from a synchronous caller, e.g. a
+    streaming Flask response. Closing the returned generator closes the async iterator.
+    """
+    loop = get_event_loop()
+    try:
+        while True:
+            try:
+                yield asyncio.run_coroutine_threadsafe(async_iterator.__anext__(), loop).result(timeout)
+            except StopAsyncIteration:
+                return
+    finally:
+        aclose = getattr(async_iterator, 'aclose', None)
+        if aclose is not None:
+            asyncio.run_coroutine_threadsafe(aclose(), loop).result(timeout)
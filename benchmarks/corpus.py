@@ -0,0 +1,84 @@
+import re
+import random
+
+TOPICS = [
+    'faith', 'repentance', 'prayer', 'covenants', 'temple', 'service', 'charity', 'hope', 'peace',
+    'forgiveness', 'family', 'scriptures', 'revelation', 'obedience', 'gratitude', 'ministering',
+    'sabbath', 'baptism', 'priesthood', 'discipleship', 'humility', 'grace', 'healing', 'joy',
+]
+FILLER = [
+    'we', 'learn', 'that', 'the', 'Lord', 'invites', 'us', 'to', 'come', 'unto', 'Him', 'and', 'receive',
+    'strength', 'as', 'our', 'hearts', 'turn', 'toward', 'heaven', 'each', 'day', 'brothers', 'sisters',
+    'promise', 'blessings', 'follow', 'Savior', 'with', 'patience', 'in', 'every', 'trial', 'of', 'life',
+]
+SPEAKERS = [f"Speaker {chr(65 + i // 26)}{chr(65 + i % 26)}" for i in range(60)]
+ROLES = ['President', 'Apostle', 'Seventy', 'General Officer']
+YEARS = range(2018, 2025)
+
+
+def make_paragraph(rng: random.Random, talk: int, index: int, speaker: str, title: str, year: int, month: str) -> dict:
+    topics = rng.sample(TOPICS, 3)
+    words = []
+    for _ in range(rng.randint(40, 110)):
+        words.append(rng.choice(topics) if rng.random() < 0.15 else rng.choice(FILLER))
+    text = " ".join(words).capitalize() + "."
+    start = index * 30
+    return {
+        'speaker': speaker,
+        'role': ROLES[talk % len(ROLES)],
+        'title': title,
+        'youtube_link': f"https://www.youtube.com/watch?v=talk{talk:05d}",
+        'paragraph_deep_link': f"https://www.churchofjesuschrist.org/study/general-conference/{year}/{month}/{talk:05d}?id=p{index + 1}",
+        'paragraph_text': text,
+        'paragraph_index': index,
+        'start_time': start,
+        'end_time': start + rng.randint(15, 45),
+    }
+
+
+def generate_corpus(paragraphs: int = 5000, paragraphs_per_talk: int = 25, seed: int = 0) -> list:
+    """
+    Deterministic synthetic corpus shaped like the real one: talks of ~25 paragraphs of
+    40-110 words, spread over speakers and conference sessions from 2018 to 2024.
+    """
+    rng = random.Random(seed)
+    corpus = []
+    talk = 0
+    while len(corpus) < paragraphs:
+        speaker = rng.choice(SPEAKERS)
+        title = f"{rng.choice(TOPICS).capitalize()} and {rng.choice(TOPICS).capitalize()} {talk}"
+        year, month = rng.choice(YEARS), rng.choice(('04', '10'))
+        for index in range(min(paragraphs_per_talk, paragraphs - len(corpus))):
+            corpus.append(make_paragraph(rng, talk, index, speaker, title, year, month))
+        talk += 1
+    return corpus
+
+
+def generate_queries(count: int, seed: int = 1) -> list:
+    """Short natural-language questions built from the corpus topics."""
+    rng = random.Random(seed)
+    templates = [
+        "How can I strengthen my {a}?",
+        "What do the apostles teach about {a} and {b}?",
+        "Quotes about {a} during hard times",
+        "How does {a} help with {b}?",
+        "{a} {b}",
+    ]
+    return [rng.choice(templates).format(a=rng.choice(TOPICS), b=rng.choice(TOPICS)) for _ in range(count)]
+
+
+# Rewordings that keep a question's meaning, applied by `paraphrase_query`
+REWORDINGS = [
+    (re.compile(r"^How can I "), "How do I "),
+    (re.compile(r"^What do the apostles teach "), "What have the apostles taught "),
+    (re.compile(r" during hard times$"), " in difficult times"),
+    (re.compile(r"^How does "), "How can "),
+    (re.compile(r"^(\w+) (\w+)$"), r"\1 and \2"),
+]
+
+
+def paraphrase_query(question: str) -> str:
+    """Reword a question from `generate_queries` without changing what it asks."""
+    for pattern, replacement in REWORDINGS:
+        question = pattern.sub(replacement, question)
+    return question
@@ -0,0 +1,271 @@
+"""
+Offline stand-ins for OpenAI embeddings, chat completions and the vector index.
+Each has configurable latency and error injection so the real pipeline can be
+benchmarked without network access or API costs.
+"""
+import re
+import json
+import time
+import zlib
+import random
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+import numpy as np
+
+DIMENSION = 3072
+_WORD_RE = re.compile(r"\w+")
+_PARAGRAPH_LINE_RE = re.compile(r"^\[(P\d+)\] (.*)$", re.MULTILINE)
+
+MALFORMED_KINDS = ('truncated', 'markdown', 'prose', 'paraphrased')
+
+
+class FakeAPIError(Exception):
+    """Injected failure, shaped like an OpenAI/Pinecone error."""
+
+    def __init__(self, message, status_code=500):
+        super().__init__(message)
+        self.status_code = status_code
+        self.response = None
+
+
+class LatencyModel:
+    """Gaussian latency in seconds (never negative) and a probability of failing each call."""
+
+    def __init__(self, mean=0.0, jitter=0.0, error_rate=0.0, seed=None):
+        self.mean = mean
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+
+    def sample(self):
+        """Return `(delay, should_fail)` for one call."""
+        with self._lock:
+            self.calls += 1
+            delay = max(0.0, self._rng.gauss(self.mean, self.jitter)) if self.jitter else self.mean
+            fail = self._rng.random() < self.error_rate
+            if fail:
+                self.errors += 1
+            return delay, fail
+
+    def wait(self, name):
+        delay, fail = self.sample()
+        if delay:
+            time.sleep(delay)
+        if fail:
+            raise FakeAPIError(f"Injected {name} failure")
+
+    async def wait_async(self, name):
+        delay, fail = self.sample()
+        if delay:
+            await asyncio.sleep(delay)
+        if fail:
+            raise FakeAPIError(f"Injected {name} failure")
+
+
+# Words that carry little meaning, and groups of words that mean about the same thing
+_FUNCTION_WORDS = {
+    'how', 'what', 'can', 'do', 'does', 'have', 'i', 'my', 'the', 'about', 'and', 'with', 'during', 'in', 'a', 'of', 'to',
+}
+_RELATED_WORDS = {
+    'can': 'can', 'do': 'can', 'does': 'can', 'have': 'can',
+    'teach': 'teach', 'taught': 'teach',
+    'hard': 'hard', 'difficult': 'hard',
+    'during': 'during', 'in': 'during',
+}
+_FUNCTION_WEIGHT = 0.3
+_RELATED_SHARE = 0.8  # Share of a related word's weight placed on its group
+_BIGRAM_WEIGHT = 0.3  # Weight of adjacent word pairs, so word order matters
+
+
+def _bucket(feature: str) -> int:
+    return zlib.crc32(feature.encode("utf-8")) % DIMENSION
+
+
+def fake_embedding(text: str) -> list:
+    """
+    Deterministic hashed-words vector, so similar texts get similar embeddings.
+    Function words count less and related words share a component, so a reworded question
+    lands close to the original (cosine about 0.9) without matching it exactly, while
+    changing its topic moves it well away.
+    """
+    vector = np.zeros(DIMENSION, dtype=np.float32)
+    words = _WORD_RE.findall(text.casefold())
+    for word in words:
+        weight = _FUNCTION_WEIGHT if word in _FUNCTION_WORDS else 1.0
+        group = _RELATED_WORDS.get(word)
+        if group is None:
+            vector[_bucket(word)] += weight
+        else:
+            vector[_bucket(word)] += weight * (1 - _RELATED_SHARE) ** 0.5
+            vector[_bucket("~" + group)] += weight * _RELATED_SHARE ** 0.5
+    for first, second in zip(words, words[1:]):
+        vector[_bucket(f"{first} {second}")] += _BIGRAM_WEIGHT
+    norm = np.linalg.norm(vector)
+    return (vector / norm if norm else vector).tolist()
+
+
+def _embedding_response(texts):
+    return SimpleNamespace(data=[SimpleNamespace(embedding=fake_embedding(text)) for text in texts])
+
+
+class _FakeRawEmbeddings:
+    def __init__(self, embeddings):
+        self._embeddings = embeddings
+
+    def create(self, model, input, **kwargs):
+        response = self._embeddings.create(model=model, input=input)
+        return SimpleNamespace(headers={}, parse=lambda: response)
+
+
+class FakeEmbeddings:
+    def __init__(self, latency: LatencyModel):
+        self.latency = latency
+        self.with_raw_response = _FakeRawEmbeddings(self)
+
+    def create(self, model, input, **kwargs):
+        self.latency.wait("embedding")
+        return _embedding_response(input)
+
+
+class FakeAsyncEmbeddings:
+    def __init__(self, latency: LatencyModel):
+        self.latency = latency
+
+    async def create(self, model, input, **kwargs):
+        await self.latency.wait_async("embedding")
+        return _embedding_response(input)
+
+
+class FakeOpenAI:
+    """Stands in for `openai.OpenAI` (embeddings only; chat goes through `FakeChat`)."""
+
+    def __init__(self, latency: LatencyModel):
+        self.embeddings = FakeEmbeddings(latency)
+
+
+class FakeAsyncOpenAI:
+    """Stands in for `openai.AsyncOpenAI` (embeddings only; chat goes through `FakeChat`)."""
+
+    def __init__(self, latency: LatencyModel):
+        self.embeddings = FakeAsyncEmbeddings(latency)
+
+
+class FakeChat:
+    """
+    Replaces `stream_chat_completion` and `async_stream_chat_completion`.
+    Answers with a JSON array selecting the first `quotes` paragraph ids of the prompt, every other
+    one with a quoted span, streamed in `chunk_size`-character pieces after `first_token` latency
+    and `per_chunk` seconds per piece. A `malformed_rate` fraction of responses is truncated,
+    wrapped in markdown, replaced with prose or paraphrased with unknown ids so verification fails.
+    """
+
+    def __init__(self, first_token: LatencyModel, per_chunk=0.0, chunk_size=24, quotes=6, malformed_rate=0.0, seed=None):
+        self.first_token = first_token
+        self.per_chunk = per_chunk
+        self.chunk_size = chunk_size
+        self.quotes = quotes
+        self.malformed_rate = malformed_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.malformed = {kind: 0 for kind in MALFORMED_KINDS}
+
+    def _response(self, user_prompt):
+        selections = []
+        for i, (local_id, text) in enumerate(_PARAGRAPH_LINE_RE.findall(user_prompt)[:self.quotes]):
+            selection = {'id': local_id}
+            if i % 2:
+                selection['quote'] = " ".join(text.split()[:12])
+            selections.append(selection)
+        with self._lock:
+            kind = self._rng.choice(MALFORMED_KINDS) if self._rng.random() < self.malformed_rate else None
+            if kind:
+                self.malformed[kind] += 1
+        if kind == 'paraphrased':
+            selections = [
+                {'id': f"X{i}", 'quote': " ".join(reversed(selection.get('quote', 'an invented quote').split()))}
+                for i, selection in enumerate(selections)
+            ]
+        body = json.dumps(selections)
+        if kind == 'truncated':
+            body = body[:len(body) // 2]
+        elif kind == 'markdown':
+            body = f"```json\n{body}\n```"
+        elif kind == 'prose':
+            body = "I'm sorry, I could not find quotes that match your question."
+        usage = {'prompt_tokens': len(user_prompt) // 4, 'completion_tokens': len(body) // 4}
+        return [body[i:i + self.chunk_size] for i in range(0, len(body), self.chunk_size)], usage
+
+    def stream(self, system_prompt, user_prompt, usage=None, **kwargs):
+        chunks, counts = self._response(user_prompt)
+        self.first_token.wait("chat completion")
+        for chunk in chunks:
+            if self.per_chunk:
+                time.sleep(self.per_chunk)
+            yield chunk
+        if usage is not None:
+            usage.update(counts)
+
+    async def stream_async(self, system_prompt, user_prompt, usage=None, **kwargs):
+        chunks, counts = self._response(user_prompt)
+        await self.first_token.wait_async("chat completion")
+        for chunk in chunks:
+            if self.per_chunk:
+                await asyncio.sleep(self.per_chunk)
+            yield chunk
+        if usage is not None:
+            usage.update(counts)
+
+
+class FakeVectorIndex:
+    """Wraps a local index so queries pay a configurable network latency and can fail."""
+
+    def __init__(self, index, latency: LatencyModel):
+        self.index = index
+        self.latency = latency
+
+    def query(self, *args, **kwargs):
+        self.latency.wait("vector query")
+        return self.index.query(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.index, name)
+
+
+class FakeGrpcIndex(FakeVectorIndex):
+    """
+    Wraps a local index in the interface of Pinecone's gRPC `GRPCIndex.query`: synchronous queries
+    return the parsed response, and `async_req=True` returns a future that resolves to the raw
+    protobuf `QueryResponse`, whose match metadata are protobuf `Struct`s.
+    """
+
+    def __init__(self, index, latency: LatencyModel, max_workers=32):
+        super().__init__(index, latency)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="fake-grpc")
+
+    def _query_proto(self, kwargs):
+        from google.protobuf.struct_pb2 import Struct
+        from pinecone.core.grpc.protos.vector_service_pb2 import QueryResponse, ScoredVector
+
+        response = super().query(**kwargs)
+        matches = []
+        for match in response.matches:
+            vector = ScoredVector(id=match.id, score=match.score)
+            if match.metadata is not None:
+                metadata = Struct()
+                metadata.update(match.metadata)
+                vector.metadata.CopyFrom(metadata)
+            matches.append(vector)
+        return QueryResponse(matches=matches, namespace=kwargs.get("namespace") or "")
+
+    def query(self, *args, async_req=False, **kwargs):
+        if async_req:
+            return self._executor.submit(self._query_proto, kwargs)
+        from google.protobuf import json_format
+        from pinecone.grpc.utils import parse_query_response
+
+        return parse_query_response(json_format.MessageToDict(self._query_proto(kwargs)), _check_type=False)
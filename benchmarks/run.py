@@ -0,0 +1,339 @@
+"""
+Offline load benchmarks for the query pipeline.
+
+    python -m benchmarks.run --scenario concurrent --paragraphs 5000 --queries 200 --clients 16
+
+The real Flask app, job queue, caches, local vector index, lexical index and verifier
+are exercised; only OpenAI and the vector index round trip are replaced with fakes
+(see benchmarks/fakes.py). Results are printed as JSON so runs can be compared.
+"""
+import os
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import resource
+import contextlib
+import tempfile
+import threading
+import tracemalloc
+import numpy as np
+
+SCENARIOS = ('concurrent', 'repeated', 'paraphrased', 'malformed', 'fast', 'batch', 'verify')
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run offline benchmarks against fake OpenAI and vector backends.")
+    parser.add_argument("--scenario", choices=SCENARIOS, default="concurrent")
+    parser.add_argument("--paragraphs", type=int, default=5000, help="Size of the synthetic corpus")
+    parser.add_argument("--queries", type=int, default=200, help="Requests to send")
+    parser.add_argument("--clients", type=int, default=16, help="Concurrent clients submitting requests")
+    parser.add_argument("--distinct", type=int, default=20, help="Distinct questions in the 'repeated' and 'paraphrased' scenarios")
+    parser.add_argument("--batch-size", type=int, default=50, help="Questions per /query/batch request in the 'batch' scenario")
+    parser.add_argument("--workers", type=int, default=4, help="QUEUE_NUM_WORKERS for the app")
+    parser.add_argument("--async-pipeline", action="store_true", help="Run jobs with ASYNC_PIPELINE=1")
+    parser.add_argument("--grpc-index", action="store_true", help="Query through a fake Pinecone gRPC index that returns protobuf responses")
+    parser.add_argument("--embedding-latency", type=float, default=0.15)
+    parser.add_argument("--vector-latency", type=float, default=0.05)
+    parser.add_argument("--llm-first-token", type=float, default=0.8)
+    parser.add_argument("--llm-per-chunk", type=float, default=0.01)
+    parser.add_argument("--jitter", type=float, default=0.2, help="Latency jitter as a fraction of the mean")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Probability each fake call fails")
+    parser.add_argument("--malformed-rate", type=float, default=0.3, help="Malformed LLM responses in the 'malformed' scenario")
+    parser.add_argument("--poll-interval", type=float, default=0.1, help="Seconds between /status polls; very short intervals compete with the workers for the GIL")
+    parser.add_argument("--trace-memory", action="store_true", help="Report peak Python allocations with tracemalloc (slower)")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args(argv)
+
+
+def configure_environment(args, data_dir):
+    """Point every store at a temporary directory; must run before the app modules are imported."""
+    os.environ.update({
+        'OPENAI_API_KEY': os.getenv('OPENAI_API_KEY', 'benchmark'),
+        'FLASK_SECRET_KEY': 'benchmark',
+        'VECTOR_BACKEND': 'local',
+        'LOCAL_INDEX_PATH': os.path.join(data_dir, 'local_index'),
+        'LEXICAL_INDEX_PATH': os.path.join(data_dir, 'lexical_index.json'),
+        'EMBEDDING_CACHE_PATH': '',
+        'MANIFEST_PATH': os.path.join(data_dir, 'manifest.sqlite3'),
+        'METADATA_STORE_PATH': os.path.join(data_dir, 'metadata.sqlite3'),
+        'WARM_CACHE_PATH': os.path.join(data_dir, 'warm_cache.sqlite3'),
+        'WARM_CACHE': '0',  # Precomputing in the background would compete with the measured requests
+        'JOB_STORE': 'memory',
+        'QUEUE_NUM_WORKERS': str(args.workers),
+        'QUEUE_MAX_SIZE': str(max(100, args.clients * 2)),
+        'ASYNC_PIPELINE': '1' if args.async_pipeline else '0',
+    })
+
+
+def build_app(args):
+    """Import the app with fake backends installed and a synthetic corpus ingested."""
+    from benchmarks import fakes
+    from benchmarks.corpus import generate_corpus
+    import ingest
+    import pinecones_utils_openai
+    import main
+    from local_index import get_local_index
+
+    def latency(mean, seed):
+        return fakes.LatencyModel(mean, mean * args.jitter, args.error_rate, seed=args.seed + seed)
+
+    # Build the corpus with instant, reliable fakes
+    setup_latency = fakes.LatencyModel()
+    setup_client = fakes.FakeOpenAI(setup_latency)
+    ingest.get_openai_client = lambda: setup_client
+    started = time.monotonic()
+    corpus = generate_corpus(args.paragraphs, seed=args.seed)
+    ingest.ingest_paragraphs(corpus, checkpoint_path=None, concurrency=4)
+    setup_seconds = time.monotonic() - started
+
+    embedding_latency = latency(args.embedding_latency, 1)
+    vector_latency = latency(args.vector_latency, 2)
+    chat = fakes.FakeChat(latency(args.llm_first_token, 3), per_chunk=args.llm_per_chunk, seed=args.seed)
+    if args.grpc_index:
+        # Take the Pinecone code paths; the corpus was already ingested into the local index
+        vector_index = fakes.FakeGrpcIndex(get_local_index(), vector_latency)
+        pinecones_utils_openai.VECTOR_BACKEND = 'pinecone'
+    else:
+        vector_index = fakes.FakeVectorIndex(get_local_index(), vector_latency)
+
+    client = fakes.FakeOpenAI(embedding_latency)
+    pinecones_utils_openai.get_openai_client = lambda: client
+    async_client = fakes.FakeAsyncOpenAI(embedding_latency)
+    pinecones_utils_openai.get_async_client = lambda: async_client
+    pinecones_utils_openai.get_vector_index = lambda: vector_index
+    main.stream_chat_completion = chat.stream
+    main.async_stream_chat_completion = chat.stream_async
+
+    fakes_in_use = {'embedding': embedding_latency, 'vector': vector_latency, 'chat': chat}
+    return main, corpus, fakes_in_use, setup_seconds
+
+
+def percentiles(values):
+    if not values:
+        return {}
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {'p50': round(float(p50), 4), 'p95': round(float(p95), 4), 'p99': round(float(p99), 4), 'max': round(max(values), 4)}
+
+
+class LoadResult:
+    def __init__(self):
+        self.latencies = []
+        self.stage_timings = {}
+        self.outcomes = {}
+        self._lock = threading.Lock()
+
+    def record(self, outcome, latency=None, timings=None):
+        with self._lock:
+            self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+            if latency is not None:
+                self.latencies.append(latency)
+        self.record_timings(timings)
+
+    def record_timings(self, timings):
+        with self._lock:
+            for stage, value in (timings or {}).items():
+                if not stage.endswith('_attempts') and not stage.endswith('_tokens'):
+                    self.stage_timings.setdefault(stage, []).append(value)
+
+
+def run_request(client, question, mode, args, result):
+    """Submit one question the way the frontend does and wait for its final status."""
+    from queue_utils import job_results
+
+    started = time.monotonic()
+    response = client.post('/query', json={'question': question, 'mode': mode})
+    body = response.get_json()
+    if response.status_code == 503:
+        result.record('rejected')
+        return
+    if response.status_code != 200:
+        result.record('failed', time.monotonic() - started)
+        return
+    if 'job_id' not in body:
+        result.record('complete' if body.get('response_text') else 'empty', time.monotonic() - started)
+        return
+
+    while True:
+        status = client.get(f"/status/{body['job_id']}").get_json()
+        if status.get('status') != 'pending':
+            break
+        time.sleep(args.poll_interval)
+    record = job_results.get(body['job_id']) or {}
+    result.record(status.get('status', 'missing'), time.monotonic() - started, record.get('timings'))
+
+
+def run_load(app_main, questions, mode, args):
+    """Closed-loop load: `args.clients` threads each send their next question once the previous one finished."""
+    result = LoadResult()
+    pending = list(enumerate(questions))
+    lock = threading.Lock()
+
+    def client_loop():
+        client = app_main.app.test_client()
+        while True:
+            with lock:
+                if not pending:
+                    return
+                _, question = pending.pop()
+            run_request(client, question, mode, args, result)
+
+    threads = [threading.Thread(target=client_loop, daemon=True) for _ in range(args.clients)]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return result, time.monotonic() - started
+
+
+def run_batch(client, questions, args, result):
+    """Submit one batch to `/query/batch`, retrying while the batch slots are full, and wait for its results."""
+    from queue_utils import job_results
+
+    started = time.monotonic()
+    while True:
+        response = client.post('/query/batch', json={'questions': questions})
+        if response.status_code != 503:
+            break
+        time.sleep(args.poll_interval)
+    body = response.get_json()
+    if response.status_code != 200:
+        for _ in questions:
+            result.record('failed', time.monotonic() - started)
+        return
+
+    while True:
+        status = client.get(f"/status/{body['job_id']}").get_json()
+        if status.get('status') != 'pending':
+            break
+        time.sleep(args.poll_interval)
+    latency = time.monotonic() - started
+    record = job_results.get(body['job_id']) or {}
+    result.record_timings(record.get('timings'))
+    if status.get('status') != 'complete':
+        for _ in questions:
+            result.record(status.get('status', 'missing'), latency)
+        return
+    for answer in status['response_text']:
+        outcome = answer['status']
+        if outcome == 'complete' and not answer['response_text']:
+            outcome = 'empty'
+        result.record(outcome, latency)
+
+
+def run_batch_load(app_main, questions, args):
+    """Split the questions into batches of `args.batch_size`, sent by `args.clients` concurrent clients."""
+    result = LoadResult()
+    pending = [questions[i:i + args.batch_size] for i in range(0, len(questions), args.batch_size)]
+    lock = threading.Lock()
+
+    def client_loop():
+        client = app_main.app.test_client()
+        while True:
+            with lock:
+                if not pending:
+                    return
+                batch = pending.pop()
+            run_batch(client, batch, args, result)
+
+    threads = [threading.Thread(target=client_loop, daemon=True) for _ in range(args.clients)]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return result, time.monotonic() - started
+
+
+def run_verify(corpus, args):
+    """Microbenchmark of prompt packing and resolving LLM selections against retrieved paragraphs."""
+    import main
+    from prompt_builder import PromptContext
+
+    rng = random.Random(args.seed)
+    result = LoadResult()
+    started = time.monotonic()
+    for _ in range(args.queries):
+        sample = rng.sample(corpus, 10)
+        paragraphs = [{'id': f"v{i}", 'paragraph_text': p['paragraph_text'], 'metadata': p} for i, p in enumerate(sample)]
+        call_started = time.monotonic()
+        context = PromptContext("benchmark question", paragraphs)
+        selections = [{'id': f"P{i + 1}"} for i in range(6)]
+        selections += [{'id': f"P{i + 1}", 'quote': sample[i]['paragraph_text'][:len(sample[i]['paragraph_text']) // 2]} for i in range(6, 8)]
+        selections += [{'id': 'P99', 'quote': sample[8]['paragraph_text']}]
+        selections += [{'quote': 'An invented quote that appears nowhere in the retrieved paragraphs.'}]
+        verified = main.resolve_quotes(selections, context)
+        result.record('complete' if verified else 'empty', time.monotonic() - call_started)
+    return result, time.monotonic() - started
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    from benchmarks.corpus import generate_queries, paraphrase_query
+
+    data_dir = tempfile.mkdtemp(prefix="quote-finder-bench-")
+    configure_environment(args, data_dir)
+    if args.trace_memory:
+        tracemalloc.start()
+
+    # The app prints progress to stdout; keep stdout for the report
+    with contextlib.redirect_stdout(sys.stderr):
+        app_main, corpus, fakes_in_use, setup_seconds = build_app(args)
+        logging.getLogger().setLevel(logging.WARNING)
+
+        if args.scenario == 'verify':
+            result, wall_seconds = run_verify(corpus, args)
+        else:
+            if args.scenario in ('repeated', 'paraphrased'):
+                pool = generate_queries(args.distinct, seed=args.seed + 1)
+                rng = random.Random(args.seed)
+                # Zipf-like popularity: a few questions account for most requests
+                weights = [1.0 / (rank + 1) for rank in range(len(pool))]
+                questions = rng.choices(pool, weights=weights, k=args.queries)
+                if args.scenario == 'paraphrased':
+                    # Half the repeats are reworded: they miss the string-keyed cache but embed close to the original
+                    questions = [paraphrase_query(q) if rng.random() < 0.5 else q for q in questions]
+            else:
+                questions = generate_queries(args.queries, seed=args.seed + 1)
+            if args.scenario == 'malformed':
+                fakes_in_use['chat'].malformed_rate = args.malformed_rate
+            if args.scenario == 'batch':
+                result, wall_seconds = run_batch_load(app_main, questions, args)
+            else:
+                mode = 'fast' if args.scenario == 'fast' else 'llm'
+                result, wall_seconds = run_load(app_main, questions, mode, args)
+
+    report = {
+        'scenario': args.scenario,
+        'pipeline': 'async' if args.async_pipeline else 'threads',
+        'vector_index': 'grpc' if args.grpc_index else 'local',
+        'paragraphs': len(corpus),
+        'requests': sum(result.outcomes.values()),
+        'outcomes': result.outcomes,
+        'setup_seconds': round(setup_seconds, 2),
+        'wall_seconds': round(wall_seconds, 3),
+        'throughput_rps': round(len(result.latencies) / wall_seconds, 2) if wall_seconds else 0.0,
+        'latency_seconds': percentiles(result.latencies),
+        'stage_seconds': {stage: percentiles(values) for stage, values in sorted(result.stage_timings.items())},
+        'fake_calls': {
+            'embedding': fakes_in_use['embedding'].calls,
+            'vector': fakes_in_use['vector'].calls,
+            'injected_errors': fakes_in_use['embedding'].errors + fakes_in_use['vector'].errors + fakes_in_use['chat'].first_token.errors,
+            'malformed_llm_responses': fakes_in_use['chat'].malformed,
+        },
+        'query_cache': app_main.query_cache.stats(),
+        'semantic_cache': app_main.semantic_cache.stats(),
+        # ru_maxrss is reported in kilobytes on Linux
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+    if args.trace_memory:
+        report['python_peak_mb'] = round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 1)
+    json.dump(report, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+import os
+import re
+import json
+import threading
+import time
+from collections import OrderedDict
+
+# Query cache configuration
+QUERY_CACHE_MAX_SIZE = int(os.getenv('QUERY_CACHE_MAX_SIZE', 1000))
+QUERY_CACHE_TTL = float(os.getenv('QUERY_CACHE_TTL', 30 * 60))
+
+_PUNCTUATION_RE = re.compile(r"[^\w\s]+")
+_PHRASE_RE = re.compile(r'("[^"]+")')
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalize a query for cache lookups: case, punctuation and whitespace are ignored.
+    Quoted phrases are kept as written (ignoring case), since lexical search must match them verbatim.
+    """
+    parts = []
+    for i, part in enumerate(_PHRASE_RE.split(query.casefold())):
+        if i % 2:
+            parts.append(part)
+        else:
+            parts.extend(_PUNCTUATION_RE.sub(" ", part).split())
+    return " ".join(parts)
+
+
+class QueryCache:
+    """
+    Bounded LRU cache of verified results with TTL expiry.
+    Also tracks in-flight jobs so identical concurrent queries share one pipeline run.
+    """
+
+    def __init__(self, max_size=QUERY_CACHE_MAX_SIZE, ttl=QUERY_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.coalesced = 0
+
+    @staticmethod
+    def make_key(query, top_k, filters=None):
+        key = f"{normalize_query(query)}_{top_k}"
+        if filters:
+            key += "_" + json.dumps(filters, sort_keys=True)
+        return key
+
+    def get(self, query, top_k, filters=None):
+        """Return cached results if present and not expired, otherwise None."""
+        key = self.make_key(query, top_k, filters)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, results = entry
+                if time.monotonic() < expires_at:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return results
+                del self._entries[key]
+                self.evictions += 1
+            self.misses += 1
+            return None
+
+    def set(self, query, top_k, results, filters=None, ttl=None):
+        """Store results for `ttl` seconds (default: the cache TTL), evicting expired and least recently used entries."""
+        key = self.make_key(query, top_k, filters)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), results)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_size:
+                self._purge_expired()
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def _purge_expired(self):
+        now = time.monotonic()
+        expired = [k for k, (expires_at, _) in self._entries.items() if now >= expires_at]
+        for k in expired:
+            del self._entries[k]
+        self.evictions += len(expired)
+
+    def claim(self, query, top_k, job_id, filters=None):
+        """
+        Register `job_id` as the pipeline run for this query.
+        Returns the job id that callers should follow: an existing in-flight job
+        for an equivalent query, or `job_id` itself if none is running.
+        """
+        key = self.make_key(query, top_k, filters)
+        with self._lock:
+            owner = self._in_flight.get(key)
+            if owner is not None:
+                self.coalesced += 1
+                return owner
+            self._in_flight[key] = job_id
+            return job_id
+
+    def release(self, query, top_k, job_id, filters=None):
+        """Clear the in-flight marker for this query if `job_id` still owns it."""
+        key = self.make_key(query, top_k, filters)
+        with self._lock:
+            if self._in_flight.get(key) == job_id:
+                del self._in_flight[key]
+
+    def stats(self):
+        """Return hit/miss counters and current sizes."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'in_flight': len(self._in_flight),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'coalesced': self.coalesced,
+            }
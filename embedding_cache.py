@@ -0,0 +1,132 @@
+import os
+import hashlib
+import threading
+import logging
+from collections import OrderedDict
+from typing import List, Optional
+import numpy as np
+from sqlite_utils import SQLiteConnections
+
+logger = logging.getLogger(__name__)
+
+# Embedding cache configuration (an empty path keeps the cache in memory only)
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "cache/embeddings.sqlite3")
+EMBEDDING_CACHE_MEMORY_SIZE = int(os.getenv("EMBEDDING_CACHE_MEMORY_SIZE", 2048))
+
+
+def embedding_key(text: str, model: str) -> str:
+    """
+    Content hash used as the cache key.
+    Only surrounding whitespace is ignored: the model is case-sensitive, so any other
+    difference in the text can change its embedding.
+    """
+    return hashlib.sha256(f"{model}\n{text.strip()}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Content-addressed embedding cache.
+    An in-process LRU sits in front of a SQLite table of float32 vectors that survives restarts.
+    """
+
+    def __init__(self, path: str = EMBEDDING_CACHE_PATH, memory_size: int = EMBEDDING_CACHE_MEMORY_SIZE):
+        self.path = path
+        self.memory_size = memory_size
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self.hits = 0
+        self.misses = 0
+
+        if path:
+            self._db = SQLiteConnections(path)
+            conn = self._db.connection()
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "key TEXT PRIMARY KEY, model TEXT NOT NULL, dim INTEGER NOT NULL, vector BLOB NOT NULL)"
+            )
+            conn.commit()
+
+    def _remember(self, key: str, vector: np.ndarray) -> None:
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def get_many(self, texts: List[str], model: str) -> List[Optional[List[float]]]:
+        """Return cached embeddings in input order, with None for texts that are not cached."""
+        keys = [embedding_key(text, model) for text in texts]
+        found = {}
+        with self._lock:
+            for key in keys:
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[key] = self._memory[key]
+
+            missing = [key for key in set(keys) if key not in found]
+            if missing and self._db is not None:
+                # Stay well under SQLite's bound-parameter limit
+                for i in range(0, len(missing), 500):
+                    chunk = missing[i:i + 500]
+                    placeholders = ",".join("?" * len(chunk))
+                    rows = self._db.connection().execute(
+                        f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", chunk
+                    ).fetchall()
+                    for key, blob in rows:
+                        vector = np.frombuffer(blob, dtype=np.float32)
+                        found[key] = vector
+                        self._remember(key, vector)
+
+            results = []
+            for key in keys:
+                vector = found.get(key)
+                if vector is None:
+                    self.misses += 1
+                    results.append(None)
+                else:
+                    self.hits += 1
+                    results.append(vector.tolist())
+            return results
+
+    def put_many(self, texts: List[str], embeddings: List[List[float]], model: str) -> None:
+        """Store embeddings for the given texts."""
+        rows = []
+        with self._lock:
+            for text, embedding in zip(texts, embeddings):
+                key = embedding_key(text, model)
+                vector = np.asarray(embedding, dtype=np.float32)
+                self._remember(key, vector)
+                rows.append((key, model, len(vector), vector.tobytes()))
+
+            if rows and self._db is not None:
+                conn = self._db.connection()
+                conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, model, dim, vector) VALUES (?, ?, ?, ?)", rows
+                )
+                conn.commit()
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and the number of vectors held in memory."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "memory_size": len(self._memory),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
+
+
+_embedding_cache = None
+_embedding_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """Return the shared embedding cache, opening it on first use."""
+    global _embedding_cache
+    if _embedding_cache is None:
+        with _embedding_cache_lock:
+            if _embedding_cache is None:
+                logger.info(f"Opening embedding cache at '{EMBEDDING_CACHE_PATH or ':memory:'}'")
+                _embedding_cache = EmbeddingCache()
+    return _embedding_cache
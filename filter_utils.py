@@ -0,0 +1,115 @@
+import re
+
+FILTER_FIELDS = ('speaker', 'title', 'year_from', 'year_to')
+
+# Talk URLs look like .../general-conference/2023/10/...
+_YEAR_RE = re.compile(r"/(\d{4})/\d{2}/")
+
+
+class FilterError(ValueError):
+    """Raised when a search filter is malformed."""
+
+
+def parse_filters(raw) -> dict:
+    """
+    Validate user-supplied filters: `speaker`, `title`, `year_from` and `year_to`.
+    Returns a dict containing only the filters that were set.
+    """
+    if not raw:
+        return {}
+    if not isinstance(raw, dict):
+        raise FilterError("Filters must be an object")
+    unknown = set(raw) - set(FILTER_FIELDS)
+    if unknown:
+        raise FilterError(f"Unknown filters: {', '.join(sorted(unknown))}")
+
+    filters = {}
+    for field in ('speaker', 'title'):
+        value = raw.get(field)
+        if value is None:
+            continue
+        if not isinstance(value, str):
+            raise FilterError(f"Filter '{field}' must be a string")
+        if value.strip():
+            filters[field] = value.strip()
+    for field in ('year_from', 'year_to'):
+        value = raw.get(field)
+        if value not in (None, ''):
+            try:
+                filters[field] = int(value)
+            except (TypeError, ValueError):
+                raise FilterError(f"Filter '{field}' must be a year")
+    return filters
+
+
+def paragraph_year(metadata: dict):
+    """Conference year of a paragraph, taken from its deep link."""
+    match = _YEAR_RE.search(metadata.get('paragraph_deep_link') or metadata.get('youtube_link') or '')
+    return int(match.group(1)) if match else None
+
+
+def has_local_filters(filters: dict) -> bool:
+    """Whether some filters cannot be pushed down to Pinecone and must be applied locally."""
+    return 'year_from' in filters or 'year_to' in filters
+
+
+def to_pinecone_filter(filters: dict):
+    """Translate the filters that Pinecone metadata supports into a Pinecone filter expression."""
+    clauses = {field: {'$eq': filters[field]} for field in ('speaker', 'title') if field in filters}
+    return clauses or None
+
+
+def matches_filters(metadata: dict, filters: dict) -> bool:
+    """Apply every filter to a paragraph's metadata."""
+    for field in ('speaker', 'title'):
+        if field in filters and metadata.get(field) != filters[field]:
+            return False
+    if has_local_filters(filters):
+        year = paragraph_year(metadata)
+        if year is None:
+            return False
+        if 'year_from' in filters and year < filters['year_from']:
+            return False
+        if 'year_to' in filters and year > filters['year_to']:
+            return False
+    return True
+
+
+def matches_pinecone_filter(metadata: dict, expression) -> bool:
+    """Evaluate a subset of Pinecone's filter language ($eq, $ne, $in, $nin, ranges, $and, $or)."""
+    if not expression:
+        return True
+    for key, condition in expression.items():
+        if key == '$and':
+            if not all(matches_pinecone_filter(metadata, sub) for sub in condition):
+                return False
+            continue
+        if key == '$or':
+            if not any(matches_pinecone_filter(metadata, sub) for sub in condition):
+                return False
+            continue
+
+        value = metadata.get(key)
+        if not isinstance(condition, dict):
+            condition = {'$eq': condition}
+        for op, operand in condition.items():
+            if op == '$eq' and value != operand:
+                return False
+            if op == '$ne' and value == operand:
+                return False
+            if op == '$in' and value not in operand:
+                return False
+            if op == '$nin' and value in operand:
+                return False
+            if op in ('$gt', '$gte', '$lt', '$lte'):
+                if value is None:
+                    return False
+                if op == '$gt' and not value > operand:
+                    return False
+                if op == '$gte' and not value >= operand:
+                    return False
+                if op == '$lt' and not value < operand:
+                    return False
+                if op == '$lte' and not value <= operand:
+                    return False
+    return True
@@ -0,0 +1,154 @@
+import os
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # Optional: responses are gzipped when brotli is not installed
+    brotli = None
+
+# Compression and HTTP caching configuration
+COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', 500))
+COMPRESS_LEVEL = int(os.getenv('COMPRESS_LEVEL', 6))
+BROTLI_QUALITY = int(os.getenv('BROTLI_QUALITY', 5))
+STATIC_MAX_AGE = int(os.getenv('STATIC_MAX_AGE', 365 * 24 * 60 * 60))  # For fingerprinted static URLs
+RESULT_MAX_AGE = int(os.getenv('RESULT_MAX_AGE', 60 * 60))  # For completed job results
+COMPRESSIBLE_MIMETYPES = {
+    'application/json', 'application/javascript', 'text/javascript', 'text/css', 'text/html', 'text/plain',
+    'image/svg+xml', 'image/x-icon', 'image/vnd.microsoft.icon',
+}
+STATIC_CACHE_SIZE = 64
+
+# Compressed static files, keyed by path, ETag and encoding
+_static_cache = OrderedDict()
+_static_cache_lock = threading.Lock()
+
+# Content hashes of static files, keyed by path and checked against the modification time
+_fingerprints = {}
+
+
+def static_fingerprint(static_folder, filename):
+    """Short content hash of a static file, recomputed only when the file changes."""
+    path = os.path.join(static_folder, filename)
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+    cached = _fingerprints.get(path)
+    if cached is None or cached[0] != mtime:
+        with open(path, 'rb') as f:
+            cached = (mtime, hashlib.sha256(f.read()).hexdigest()[:12])
+        _fingerprints[path] = cached
+    return cached[1]
+
+
+def choose_encoding():
+    """Best content encoding the client accepts: brotli, then gzip, else None."""
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br']:
+        return 'br'
+    if accepted['gzip']:
+        return 'gzip'
+    return None
+
+
+def compress(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=COMPRESS_LEVEL, mtime=0)
+
+
+def _compressed_static(response, encoding):
+    key = (request.path, response.get_etag()[0], encoding)
+    with _static_cache_lock:
+        data = _static_cache.get(key)
+        if data is not None:
+            _static_cache.move_to_end(key)
+            return data
+    data = compress(response.get_data(), encoding)
+    with _static_cache_lock:
+        _static_cache[key] = data
+        while len(_static_cache) > STATIC_CACHE_SIZE:
+            _static_cache.popitem(last=False)
+    return data
+
+
+def compress_response(response):
+    """
+    Compress JSON, HTML and static responses with brotli or gzip.
+    Streamed responses (including Server-Sent Events), partial and empty responses are left alone.
+    A strong ETag becomes weak, since the compressed bytes differ from the original.
+    """
+    # Files sent from disk are "streamed" too, but their size is known up front
+    streamed = response.is_streamed and not response.direct_passthrough
+    if (request.method == 'HEAD' or response.status_code != 200 or streamed
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES or 'Content-Encoding' in response.headers):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = choose_encoding()
+    if encoding is None:
+        return response
+
+    # Static files are sent straight from disk; read them so they can be compressed
+    response.direct_passthrough = False
+    if response.content_length is not None and response.content_length < COMPRESS_MIN_SIZE:
+        return response
+    if request.endpoint == 'static' and response.get_etag()[0]:
+        data = _compressed_static(response, encoding)
+    else:
+        data = response.get_data()
+        if len(data) < COMPRESS_MIN_SIZE:
+            return response
+        data = compress(data, encoding)
+
+    response.set_data(data)
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def cache_static_response(response):
+    """Let browsers keep fingerprinted static files for a year; other URLs revalidate with the ETag."""
+    if request.endpoint == 'static' and response.status_code in (200, 304):
+        if request.args.get('v'):
+            response.cache_control.no_cache = None
+            response.cache_control.public = True
+            response.cache_control.max_age = STATIC_MAX_AGE
+            response.cache_control.immutable = True
+        else:
+            response.cache_control.no_cache = True
+    return response
+
+
+def cache_result_response(response, complete):
+    """
+    Completed results never change, so they get a weak ETag, a private max-age and a 304 for a
+    matching `If-None-Match`; pending and failed results must not be cached.
+    """
+    if not complete:
+        response.cache_control.no_store = True
+        return response
+    response.add_etag(weak=True)
+    response.cache_control.private = True
+    response.cache_control.max_age = RESULT_MAX_AGE
+    return response.make_conditional(request)
+
+
+def init_app(app):
+    """Fingerprint static URLs and compress and cache responses for `app`."""
+
+    @app.url_defaults
+    def add_static_fingerprint(endpoint, values):
+        if endpoint == 'static' and 'filename' in values and 'v' not in values:
+            fingerprint = static_fingerprint(app.static_folder, values['filename'])
+            if fingerprint:
+                values['v'] = fingerprint
+
+    @app.after_request
+    def compress_and_cache(response):
+        return compress_response(cache_static_response(response))
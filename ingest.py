@@ -0,0 +1,283 @@
+import os
+import re
+import json
+import time
+import argparse
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator, List
+from openai_utils import get_client as get_openai_client
+from embedding_cache import get_embedding_cache
+from lexical_index import get_lexical_index
+from pinecones_utils_openai import (
+    get_vector_index,
+    paragraph_metadata,
+    stable_paragraph_id,
+    upsert_records,
+    store_metadata,
+    flush_vector_index,
+    validate_embedding_dimension,
+    EMBEDDING_MODEL,
+    BATCH_SIZE,
+)
+
+logger = logging.getLogger(__name__)
+
+# Ingestion configuration
+INGEST_CONCURRENCY = int(os.getenv("INGEST_CONCURRENCY", 4))
+INGEST_REQUESTS_PER_MINUTE = float(os.getenv("INGEST_REQUESTS_PER_MINUTE", 3000))
+INGEST_TOKENS_PER_MINUTE = float(os.getenv("INGEST_TOKENS_PER_MINUTE", 1000000))
+CHECKPOINT_EVERY_BATCHES = int(os.getenv("INGEST_CHECKPOINT_EVERY", 10))
+MAX_RATE_LIMIT_RETRIES = 5
+
+_RESET_PART_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_RESET_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def parse_reset(value) -> float:
+    """Parse OpenAI reset durations such as '20ms', '1s' or '6m0s' into seconds."""
+    if not value:
+        return 0.0
+    return sum(float(amount) * _RESET_UNITS[unit] for amount, unit in _RESET_PART_RE.findall(value))
+
+
+def _header_number(headers, name):
+    value = headers.get(name)
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at a per-minute rate."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.level = per_minute
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, amount: float = 1) -> None:
+        """Block until `amount` tokens are available, then take them."""
+        amount = min(amount, self.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self.paused_until and self.level >= amount:
+                    self.level -= amount
+                    return
+                wait = max(self.paused_until - now, (amount - self.level) / self.rate)
+            time.sleep(wait)
+
+    def sync(self, limit=None, remaining=None, reset_seconds=0.0) -> None:
+        """Align the bucket with the limits the API reported."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if limit:
+                self.capacity = limit
+                self.rate = limit / 60.0
+            if remaining is not None:
+                self.level = min(self.level, remaining)
+                if remaining <= 0 and reset_seconds:
+                    self.paused_until = max(self.paused_until, now + reset_seconds)
+
+
+class RateLimiter:
+    """Request and token buckets driven by the x-ratelimit-* response headers."""
+
+    def __init__(self, requests_per_minute=INGEST_REQUESTS_PER_MINUTE, tokens_per_minute=INGEST_TOKENS_PER_MINUTE):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+
+    def acquire(self, tokens: int) -> None:
+        self.requests.acquire(1)
+        self.tokens.acquire(tokens)
+
+    def update_from_headers(self, headers) -> None:
+        if not headers:
+            return
+        self.requests.sync(
+            _header_number(headers, "x-ratelimit-limit-requests"),
+            _header_number(headers, "x-ratelimit-remaining-requests"),
+            parse_reset(headers.get("x-ratelimit-reset-requests")),
+        )
+        self.tokens.sync(
+            _header_number(headers, "x-ratelimit-limit-tokens"),
+            _header_number(headers, "x-ratelimit-remaining-tokens"),
+            parse_reset(headers.get("x-ratelimit-reset-tokens")),
+        )
+
+    def back_off(self, headers) -> None:
+        """Pause both buckets after a 429 until the API says capacity is back."""
+        delay = max(
+            parse_reset(headers.get("x-ratelimit-reset-requests")) if headers else 0.0,
+            parse_reset(headers.get("x-ratelimit-reset-tokens")) if headers else 0.0,
+            1.0,
+        )
+        self.requests.sync(remaining=0, reset_seconds=delay)
+        self.tokens.sync(remaining=0, reset_seconds=delay)
+
+
+def estimate_tokens(texts: List[str]) -> int:
+    """Rough token count used for rate limiting (about four characters per token)."""
+    return sum(len(text) // 4 + 1 for text in texts)
+
+
+def embed_batch(texts: List[str], limiter: RateLimiter, model: str = EMBEDDING_MODEL) -> List[List[float]]:
+    """
+    Embed one batch under the rate limiter, skipping texts already in the embedding cache.
+    """
+    cache = get_embedding_cache()
+    embeddings = cache.get_many(texts, model)
+    missing = list(dict.fromkeys(text for text, emb in zip(texts, embeddings) if emb is None))
+    if not missing:
+        return embeddings
+
+    for attempt in range(MAX_RATE_LIMIT_RETRIES):
+        limiter.acquire(estimate_tokens(missing))
+        try:
+            raw = get_openai_client().embeddings.with_raw_response.create(model=model, input=missing)
+        except Exception as e:
+            response = getattr(e, "response", None)
+            if getattr(e, "status_code", None) == 429 and attempt < MAX_RATE_LIMIT_RETRIES - 1:
+                logger.warning(f"Rate limited while embedding, backing off (attempt {attempt + 1})")
+                limiter.back_off(response.headers if response is not None else None)
+                continue
+            raise
+        limiter.update_from_headers(raw.headers)
+        new_embeddings = [item.embedding for item in raw.parse().data]
+        break
+
+    for emb in new_embeddings:
+        validate_embedding_dimension(emb)
+    cache.put_many(missing, new_embeddings, model)
+    lookup = dict(zip(missing, new_embeddings))
+    return [emb if emb is not None else lookup[text] for text, emb in zip(texts, embeddings)]
+
+
+def read_jsonl(path: str) -> Iterator[dict]:
+    """Stream paragraphs from a JSON Lines file, one object per line."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def iter_batches(paragraphs: Iterable[dict], batch_size: int, skip: int = 0):
+    """Yield lists of up to `batch_size` paragraphs, skipping the first `skip` paragraphs."""
+    batch = []
+    for position, paragraph in enumerate(paragraphs):
+        if position < skip:
+            continue
+        batch.append(paragraph)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def load_checkpoint(path: str) -> int:
+    """Number of paragraphs a previous run fully ingested."""
+    if not path or not os.path.exists(path):
+        return 0
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f).get("processed", 0)
+
+
+def save_checkpoint(path: str, processed: int) -> None:
+    if not path:
+        return
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"processed": processed, "updated_at": time.time()}, f)
+    os.replace(tmp_path, path)
+
+
+def ingest_paragraphs(paragraphs: Iterable[dict], checkpoint_path: str = None, batch_size: int = BATCH_SIZE, concurrency: int = INGEST_CONCURRENCY) -> int:
+    """
+    Embed and upsert a stream of paragraphs with bounded memory.
+    Batches are embedded and upserted concurrently under a shared rate limiter. Progress is
+    checkpointed in input order, so a crashed run resumes after the last checkpoint; work
+    redone on resume hits the embedding cache. Returns the number of paragraphs ingested.
+    """
+    index = get_vector_index()
+    lexical_index = get_lexical_index()
+    limiter = RateLimiter()
+    skip = load_checkpoint(checkpoint_path)
+    if skip:
+        logger.info(f"Resuming ingestion after {skip} paragraphs")
+
+    def process_batch(batch: List[dict]) -> None:
+        embeddings = embed_batch([p["paragraph_text"] for p in batch], limiter)
+        records = [
+            (p.get("id") or stable_paragraph_id(p), embedding, paragraph_metadata(p))
+            for p, embedding in zip(batch, embeddings)
+        ]
+        upsert_records(index, records)
+        store_metadata(records)
+        lexical_index.add_many((record_id, metadata) for record_id, _, metadata in records)
+
+    def checkpoint(processed: int) -> None:
+        # Persist the side indexes first so the checkpoint never runs ahead of them
+        flush_vector_index(index)
+        lexical_index.save()
+        save_checkpoint(checkpoint_path, processed)
+        logger.info(f"Checkpoint: {processed} paragraphs ingested")
+
+    processed = skip
+    batches_since_checkpoint = 0
+    in_flight = deque()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        def complete_oldest():
+            nonlocal processed, batches_since_checkpoint
+            future, count = in_flight.popleft()
+            future.result()
+            processed += count
+            batches_since_checkpoint += 1
+            if batches_since_checkpoint >= CHECKPOINT_EVERY_BATCHES:
+                checkpoint(processed)
+                batches_since_checkpoint = 0
+
+        for batch in iter_batches(paragraphs, batch_size, skip):
+            in_flight.append((pool.submit(process_batch, batch), len(batch)))
+            # Bound the number of batches held in memory
+            if len(in_flight) >= concurrency * 2:
+                complete_oldest()
+        while in_flight:
+            complete_oldest()
+
+    checkpoint(processed)
+    logger.info(f"Ingestion complete: {processed - skip} paragraphs ingested in this run")
+    return processed - skip
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Embed and upsert paragraphs from a JSON Lines file.")
+    parser.add_argument("path", help="JSONL file with one paragraph object per line")
+    parser.add_argument("--checkpoint", help="Checkpoint file (default: <path>.checkpoint.json)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--concurrency", type=int, default=INGEST_CONCURRENCY)
+    parser.add_argument("--restart", action="store_true", help="Ignore any existing checkpoint")
+    args = parser.parse_args()
+
+    checkpoint_path = args.checkpoint or f"{args.path}.checkpoint.json"
+    if args.restart and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    ingest_paragraphs(read_jsonl(args.path), checkpoint_path, args.batch_size, args.concurrency)
+
+
+if __name__ == "__main__":
+    main()
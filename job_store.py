@@ -0,0 +1,142 @@
+import os
+import json
+import time
+import threading
+import logging
+from collections import OrderedDict
+from sqlite_utils import SQLiteConnections
+
+logger = logging.getLogger(__name__)
+
+# Job store configuration
+JOB_STORE = os.getenv("JOB_STORE", "memory")  # "memory" or "sqlite"
+JOB_STORE_PATH = os.getenv("JOB_STORE_PATH", "cache/jobs.sqlite3")
+JOB_STORE_TTL = float(os.getenv("JOB_STORE_TTL", 60 * 60))
+JOB_STORE_MAX_SIZE = int(os.getenv("JOB_STORE_MAX_SIZE", 10000))
+PURGE_EVERY_WRITES = 100
+
+
+class MemoryJobStore:
+    """
+    Job status records for this process only.
+    Records expire `ttl` seconds after their last update; the least recently updated
+    records are dropped once there are more than `max_size`.
+    """
+
+    def __init__(self, ttl=JOB_STORE_TTL, max_size=JOB_STORE_MAX_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._records = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, job_id):
+        """Return the job's record, or None if it is unknown or expired."""
+        with self._lock:
+            entry = self._records.get(job_id)
+            if entry is None:
+                return None
+            updated_at, record = entry
+            if time.monotonic() - updated_at >= self.ttl:
+                del self._records[job_id]
+                self.evictions += 1
+                return None
+            return record
+
+    def set(self, job_id, record):
+        with self._lock:
+            self._records[job_id] = (time.monotonic(), record)
+            self._records.move_to_end(job_id)
+            if len(self._records) > self.max_size:
+                self._purge_expired()
+            while len(self._records) > self.max_size:
+                self._records.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, job_id):
+        with self._lock:
+            self._records.pop(job_id, None)
+
+    def _purge_expired(self):
+        now = time.monotonic()
+        expired = [k for k, (updated_at, _) in self._records.items() if now - updated_at >= self.ttl]
+        for k in expired:
+            del self._records[k]
+        self.evictions += len(expired)
+
+    def stats(self):
+        with self._lock:
+            return {'backend': 'memory', 'size': len(self._records), 'max_size': self.max_size, 'evictions': self.evictions}
+
+
+class SQLiteJobStore:
+    """
+    Job status records in a SQLite file shared by every process on the host.
+    WAL mode lets web processes poll while workers write. Expired and excess records
+    are purged every few writes.
+    Only the records are shared: each job still runs on the queue of the process that
+    accepted it, and that process alone holds its in-flight state and stream events.
+    """
+
+    def __init__(self, path=JOB_STORE_PATH, ttl=JOB_STORE_TTL, max_size=JOB_STORE_MAX_SIZE):
+        self.path = path
+        self.ttl = ttl
+        self.max_size = max_size
+        self._db = SQLiteConnections(path)
+        self._writes = 0
+        self._lock = threading.Lock()
+        conn = self._db.connection()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, record TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS jobs_updated_at ON jobs (updated_at)")
+        conn.commit()
+
+    def get(self, job_id):
+        """Return the job's record, or None if it is unknown or expired."""
+        row = self._db.connection().execute(
+            "SELECT record FROM jobs WHERE id = ? AND updated_at > ?", (job_id, time.time() - self.ttl)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, job_id, record):
+        conn = self._db.connection()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO jobs (id, record, updated_at) VALUES (?, ?, ?)",
+                (job_id, json.dumps(record), time.time())
+            )
+        with self._lock:
+            self._writes += 1
+            purge = self._writes % PURGE_EVERY_WRITES == 0
+        if purge:
+            self.purge()
+
+    def delete(self, job_id):
+        conn = self._db.connection()
+        with conn:
+            conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+
+    def purge(self):
+        """Delete expired records and trim the table to `max_size`, keeping the newest."""
+        conn = self._db.connection()
+        with conn:
+            conn.execute("DELETE FROM jobs WHERE updated_at <= ?", (time.time() - self.ttl,))
+            conn.execute(
+                "DELETE FROM jobs WHERE id NOT IN (SELECT id FROM jobs ORDER BY updated_at DESC LIMIT ?)",
+                (self.max_size,)
+            )
+
+    def stats(self):
+        size = self._db.connection().execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+        return {'backend': 'sqlite', 'size': size, 'max_size': self.max_size}
+
+
+def create_job_store(backend=JOB_STORE):
+    if backend == "memory":
+        return MemoryJobStore()
+    if backend == "sqlite":
+        logger.info(f"Using shared SQLite job store at '{JOB_STORE_PATH}'")
+        return SQLiteJobStore()
+    raise ValueError(f"Unknown JOB_STORE: {backend}")
@@ -0,0 +1,71 @@
+import json
+
+
+class JSONArrayStreamParser:
+    """
+    Incrementally parses a JSON array of objects as it is streamed.
+    Each top-level object is returned from `feed` as soon as its closing brace arrives,
+    so earlier elements survive even if the rest of the output is malformed or truncated.
+    """
+
+    def __init__(self):
+        self.started = False   # saw the opening '[' of the array
+        self.finished = False  # saw the closing ']' of the array
+        self.errors = 0        # elements that closed but were not valid JSON
+        self._buffer = []
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, chunk: str) -> list:
+        """Consume the next piece of text and return the objects completed by it."""
+        completed = []
+        for char in chunk:
+            if self.finished:
+                break
+
+            if not self.started:
+                # Skip any preamble such as a markdown code fence
+                if char == '[':
+                    self.started = True
+                continue
+
+            if self._depth == 0:
+                if char == '{':
+                    self._depth = 1
+                    self._buffer = [char]
+                elif char == ']':
+                    self.finished = True
+                continue
+
+            self._buffer.append(char)
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in '{[':
+                self._depth += 1
+            elif char in '}]':
+                self._depth -= 1
+                if self._depth == 0:
+                    element = self._decode(''.join(self._buffer))
+                    if element is not None:
+                        completed.append(element)
+                    self._buffer = []
+        return completed
+
+    def _decode(self, text: str):
+        try:
+            element = json.loads(text)
+        except json.JSONDecodeError:
+            self.errors += 1
+            return None
+        if not isinstance(element, dict):
+            self.errors += 1
+            return None
+        return element
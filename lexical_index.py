@@ -0,0 +1,182 @@
+import os
+import re
+import sys
+import json
+import math
+import heapq
+import threading
+import logging
+from collections import Counter
+from ranking_utils import tokenize, BM25_K1, BM25_B
+from filter_utils import matches_filters
+from metadata_store import get_metadata_store
+
+logger = logging.getLogger(__name__)
+
+# Lexical index configuration
+LEXICAL_INDEX_PATH = os.getenv("LEXICAL_INDEX_PATH", "cache/lexical_index.json")
+
+_PHRASE_RE = re.compile(r'"([^"]+)"')
+_CANDIDATE_CHUNK = 200  # Ranked candidates checked at a time against filters and phrases
+
+
+class LexicalIndex:
+    """
+    BM25 inverted index over paragraph text, speaker and title.
+    Quoted phrases in a query must appear verbatim (ignoring case) in the paragraph.
+    Paragraph metadata, needed for filters, phrases and lexical-only hits, is read from the
+    metadata store when one is given; the index then holds only its postings and is built from
+    the store on load. Without a store, the metadata is kept in memory and persisted to `path`.
+    """
+
+    def __init__(self, path: str = LEXICAL_INDEX_PATH, metadata_store=None):
+        self.path = path
+        self.metadata_store = metadata_store
+        self.documents = {}   # id -> metadata, only without a metadata store
+        self.terms = {}       # id -> distinct terms, to remove its postings
+        self.lengths = {}     # id -> token count
+        self.postings = {}    # term -> {id: term frequency}
+        self._total_length = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.lengths)
+
+    @staticmethod
+    def _document_tokens(metadata: dict) -> list:
+        return tokenize(" ".join([
+            metadata.get("paragraph_text", ""),
+            metadata.get("speaker", ""),
+            metadata.get("title", ""),
+        ]))
+
+    def _remove_locked(self, doc_id: str) -> None:
+        terms = self.terms.pop(doc_id, None)
+        if terms is None:
+            return
+        self.documents.pop(doc_id, None)
+        self._total_length -= self.lengths.pop(doc_id, 0)
+        for term in terms:
+            postings = self.postings.get(term)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self.postings[term]
+
+    def add_many(self, records) -> None:
+        """Index `(id, metadata)` pairs, replacing any existing entries with the same id."""
+        with self._lock:
+            for doc_id, metadata in records:
+                self._remove_locked(doc_id)
+                tokens = self._document_tokens(metadata)
+                counts = Counter(sys.intern(token) for token in tokens)
+                if self.metadata_store is None:
+                    self.documents[doc_id] = metadata
+                self.terms[doc_id] = tuple(counts)
+                self.lengths[doc_id] = len(tokens)
+                self._total_length += len(tokens)
+                for term, freq in counts.items():
+                    self.postings.setdefault(term, {})[doc_id] = freq
+
+    def remove_many(self, doc_ids) -> None:
+        with self._lock:
+            for doc_id in doc_ids:
+                self._remove_locked(doc_id)
+
+    def search(self, query: str, top_k: int = 10, filters: dict = None) -> list:
+        """Return up to `top_k` (id, score) pairs ranked by BM25, honouring metadata filters."""
+        phrases = [p.casefold() for p in _PHRASE_RE.findall(query)]
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+
+        with self._lock:
+            doc_count = len(self.lengths)
+            if not doc_count:
+                return []
+            avg_length = self._total_length / doc_count or 1.0
+            scores = {}
+            for term in terms:
+                postings = self.postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, freq in postings.items():
+                    length_norm = BM25_K1 * (1 - BM25_B + BM25_B * self.lengths[doc_id] / avg_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * freq * (BM25_K1 + 1) / (freq + length_norm)
+
+        if not filters and not phrases:
+            return heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+
+        def accepted(metadata):
+            if filters and not matches_filters(metadata, filters):
+                return False
+            text = metadata.get("paragraph_text", "").casefold()
+            return all(phrase in text for phrase in phrases)
+
+        # Check the best candidates first, so only as much metadata is read as the filters need
+        candidates = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        ranked = []
+        for i in range(0, len(candidates), _CANDIDATE_CHUNK):
+            chunk = candidates[i:i + _CANDIDATE_CHUNK]
+            metadata = self.get_metadata_many([doc_id for doc_id, _ in chunk])
+            for doc_id, score in chunk:
+                if doc_id in metadata and accepted(metadata[doc_id]):
+                    ranked.append((doc_id, score))
+                    if len(ranked) == top_k:
+                        return ranked
+        return ranked
+
+    def get_metadata_many(self, doc_ids: list) -> dict:
+        """Return `{id: metadata}` for the given ids; unknown ids are left out."""
+        if self.metadata_store is not None:
+            return self.metadata_store.get_many(doc_ids)
+        return {doc_id: self.documents[doc_id] for doc_id in doc_ids if doc_id in self.documents}
+
+    def save(self) -> None:
+        """Persist the indexed documents; postings are rebuilt on load. With a metadata store there is nothing to save."""
+        if self.metadata_store is not None:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            snapshot = dict(self.documents)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f)
+        os.replace(tmp_path, self.path)
+        logger.info(f"Saved lexical index with {len(snapshot)} paragraphs to '{self.path}'")
+
+    def load(self) -> "LexicalIndex":
+        if self.metadata_store is not None:
+            if not self.metadata_store.has_rows() and os.path.exists(self.path):
+                # Move paragraphs indexed before the metadata store existed into it
+                self.metadata_store.put_many(self._read_snapshot().items())
+            self.add_many(self.metadata_store.iter_all())
+            logger.info(f"Built lexical index with {len(self)} paragraphs from the metadata store")
+            return self
+        if not os.path.exists(self.path):
+            logger.info(f"No lexical index at '{self.path}', starting empty")
+            return self
+        self.add_many(self._read_snapshot().items())
+        logger.info(f"Loaded lexical index with {len(self)} paragraphs from '{self.path}'")
+        return self
+
+    def _read_snapshot(self) -> dict:
+        with open(self.path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+
+_lexical_index = None
+_lexical_index_lock = threading.Lock()
+
+
+def get_lexical_index() -> LexicalIndex:
+    """Return the shared lexical index, loading it from disk or the metadata store on first use."""
+    global _lexical_index
+    if _lexical_index is None:
+        with _lexical_index_lock:
+            if _lexical_index is None:
+                _lexical_index = LexicalIndex(metadata_store=get_metadata_store()).load()
+    return _lexical_index
@@ -0,0 +1,295 @@
+import os
+import json
+import threading
+import logging
+from collections import namedtuple
+from typing import List, Optional
+import numpy as np
+from filter_utils import matches_pinecone_filter
+
+logger = logging.getLogger(__name__)
+
+# Local index configuration
+LOCAL_INDEX_PATH = os.getenv("LOCAL_INDEX_PATH", "cache/local_index")
+LOCAL_INDEX_MODE = os.getenv("LOCAL_INDEX_MODE", "exact")  # "exact" or "ivf"
+LOCAL_INDEX_DTYPE = os.getenv("LOCAL_INDEX_DTYPE", "float32")  # "float32" or "float16"
+IVF_NPROBE = int(os.getenv("LOCAL_INDEX_NPROBE", 8))
+
+VECTORS_FILE = "vectors.npy"
+METADATA_FILE = "metadata.json"
+SCAN_BLOCK_ROWS = 8192
+
+# Mirror the shape of Pinecone query responses so callers can use either backend
+LocalMatch = namedtuple("LocalMatch", ["id", "score", "metadata"])
+LocalQueryResponse = namedtuple("LocalQueryResponse", ["matches"])
+LocalVector = namedtuple("LocalVector", ["id", "values", "metadata"])
+LocalFetchResponse = namedtuple("LocalFetchResponse", ["vectors"])
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class LocalVectorIndex:
+    """
+    In-memory cosine similarity index over a snapshot of vectors and metadata.
+    Exact mode scans the whole matrix; IVF mode only scans the lists closest to the query.
+    """
+
+    def __init__(self, path: str = LOCAL_INDEX_PATH, mode: str = LOCAL_INDEX_MODE, dtype: str = LOCAL_INDEX_DTYPE, nprobe: int = IVF_NPROBE):
+        if mode not in ("exact", "ivf"):
+            raise ValueError(f"Unknown local index mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.dtype = np.dtype(dtype)
+        self.nprobe = nprobe
+        self.ids: List[str] = []
+        self.metadata: List[dict] = []
+        self.vectors = np.zeros((0, 0), dtype=self.dtype)
+        self._id_positions = {}
+        self._centroids = None
+        self._lists = None
+        self._pending = []    # rows upserted since the matrix was last consolidated
+        self._dirty = False   # changes not yet written to the snapshot
+        self._lock = threading.Lock()
+
+    # Snapshot persistence
+
+    def load(self) -> "LocalVectorIndex":
+        """Load the snapshot from disk; float16 snapshots are memory-mapped."""
+        vectors_path = os.path.join(self.path, VECTORS_FILE)
+        metadata_path = os.path.join(self.path, METADATA_FILE)
+        if not os.path.exists(vectors_path):
+            logger.info(f"No local index snapshot at '{self.path}', starting empty")
+            return self
+
+        mmap_mode = "r" if self.dtype == np.float16 else None
+        vectors = np.load(vectors_path, mmap_mode=mmap_mode)
+        if vectors.dtype != self.dtype:
+            vectors = vectors.astype(self.dtype)
+        with open(metadata_path, "r", encoding="utf-8") as f:
+            snapshot = json.load(f)
+
+        with self._lock:
+            self.vectors = vectors
+            self.ids = snapshot["ids"]
+            self.metadata = snapshot["metadata"]
+            self._id_positions = {vector_id: i for i, vector_id in enumerate(self.ids)}
+            self._build_ivf()
+        logger.info(f"Loaded local index with {len(self.ids)} vectors from '{self.path}' ({self.mode} mode)")
+        return self
+
+    def save(self) -> None:
+        """Write the current vectors and metadata as a snapshot."""
+        os.makedirs(self.path, exist_ok=True)
+        with self._lock:
+            self._consolidate()
+            vectors = np.asarray(self.vectors, dtype=self.dtype)
+            snapshot = {"ids": list(self.ids), "metadata": list(self.metadata)}
+            self._dirty = False
+        # Write to temporary files first so a crash never leaves a half-written snapshot
+        vectors_tmp = os.path.join(self.path, "vectors.tmp.npy")
+        metadata_tmp = os.path.join(self.path, METADATA_FILE + ".tmp")
+        np.save(vectors_tmp, vectors)
+        with open(metadata_tmp, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f)
+        os.replace(vectors_tmp, os.path.join(self.path, VECTORS_FILE))
+        os.replace(metadata_tmp, os.path.join(self.path, METADATA_FILE))
+        logger.info(f"Saved local index snapshot with {len(snapshot['ids'])} vectors to '{self.path}'")
+
+    # Pinecone-compatible operations
+
+    def flush(self) -> None:
+        """Write the snapshot if anything changed since it was last saved."""
+        if self._dirty:
+            self.save()
+
+    def upsert(self, vectors, namespace: Optional[str] = None, **kwargs) -> None:
+        """
+        Insert or replace `(id, values, metadata)` records.
+        New rows are buffered and merged into the matrix on the next query; call `flush` to persist.
+        """
+        if not vectors:
+            return
+        ids = [record[0] for record in vectors]
+        matrix = _normalize_rows(np.asarray([record[1] for record in vectors], dtype=np.float32))
+        metadata = [record[2] if len(record) > 2 else {} for record in vectors]
+
+        with self._lock:
+            for vector_id, row, meta in zip(ids, matrix, metadata):
+                position = self._id_positions.get(vector_id)
+                if position is None:
+                    self._id_positions[vector_id] = len(self.ids)
+                    self.ids.append(vector_id)
+                    self.metadata.append(meta)
+                    self._pending.append(row)
+                    continue
+                self.metadata[position] = meta
+                if position >= len(self.vectors):
+                    self._pending[position - len(self.vectors)] = row
+                else:
+                    if not self.vectors.flags.writeable:
+                        self.vectors = np.array(self.vectors)  # copy a read-only memory map before editing
+                    self.vectors[position] = row
+            self._dirty = True
+            self._centroids = None
+
+    def update(self, id: str, set_metadata: Optional[dict] = None, namespace: Optional[str] = None, **kwargs) -> None:
+        """Merge `set_metadata` into the metadata of an existing vector."""
+        with self._lock:
+            position = self._id_positions.get(id)
+            if position is None or not set_metadata:
+                return
+            self.metadata[position] = dict(self.metadata[position], **set_metadata)
+            self._dirty = True
+
+    def delete(self, ids: List[str], namespace: Optional[str] = None, **kwargs) -> None:
+        """Remove vectors by id."""
+        with self._lock:
+            self._consolidate()
+            remove = {self._id_positions[i] for i in ids if i in self._id_positions}
+            if not remove:
+                return
+            keep = [p for p in range(len(self.ids)) if p not in remove]
+            self.vectors = np.asarray(self.vectors)[keep]
+            self.ids = [self.ids[p] for p in keep]
+            self.metadata = [self.metadata[p] for p in keep]
+            self._id_positions = {vector_id: i for i, vector_id in enumerate(self.ids)}
+            self._dirty = True
+            self._centroids = None
+
+    def list(self, namespace: Optional[str] = None, **kwargs):
+        """Yield pages of vector ids, like Pinecone's `list`."""
+        with self._lock:
+            ids = list(self.ids)
+        for i in range(0, len(ids), 1000):
+            yield ids[i:i + 1000]
+
+    def fetch(self, ids: List[str], namespace: Optional[str] = None, **kwargs) -> LocalFetchResponse:
+        """Return the stored vectors and metadata for `ids`, like Pinecone's `fetch`; unknown ids are left out."""
+        with self._lock:
+            self._consolidate()
+            return LocalFetchResponse(vectors={
+                vector_id: LocalVector(
+                    id=vector_id,
+                    values=np.asarray(self.vectors[self._id_positions[vector_id]], dtype=np.float32).tolist(),
+                    metadata=self.metadata[self._id_positions[vector_id]]
+                )
+                for vector_id in ids if vector_id in self._id_positions
+            })
+
+    def query(self, vector, top_k: int = 10, namespace: Optional[str] = None, include_metadata: bool = True, filter: Optional[dict] = None, **kwargs) -> LocalQueryResponse:
+        """Return the `top_k` most similar vectors by cosine similarity, optionally restricted by a metadata filter."""
+        query = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+
+        with self._lock:
+            if not self.ids:
+                return LocalQueryResponse(matches=[])
+            self._consolidate()
+            if self.mode == "ivf" and self._centroids is not None:
+                candidates = self._probe(query)
+            else:
+                candidates = None
+            if filter:
+                allowed = candidates if candidates is not None else range(len(self.ids))
+                candidates = np.array(
+                    [p for p in allowed if matches_pinecone_filter(self.metadata[p], filter)], dtype=np.int64
+                )
+                if not len(candidates):
+                    return LocalQueryResponse(matches=[])
+            positions, scores = self._scan(query, top_k, candidates)
+            return LocalQueryResponse(matches=[
+                LocalMatch(
+                    id=self.ids[p],
+                    score=float(s),
+                    metadata=self.metadata[p] if include_metadata else None
+                )
+                for p, s in zip(positions, scores)
+            ])
+
+    def describe_index_stats(self) -> dict:
+        return {"dimension": int(self.vectors.shape[1]) if len(self.ids) else 0, "total_vector_count": len(self.ids)}
+
+    # Search internals
+
+    def _consolidate(self) -> None:
+        """Merge buffered rows into the matrix and rebuild IVF lists if they are stale."""
+        if self._pending:
+            pending = np.asarray(self._pending, dtype=self.dtype)
+            self.vectors = np.vstack([self.vectors, pending]) if len(self.vectors) else pending
+            self._pending = []
+        if self.mode == "ivf" and self._centroids is None:
+            self._build_ivf()
+
+    def _scan(self, query: np.ndarray, top_k: int, candidates: Optional[np.ndarray]):
+        """Score candidate rows (or all rows) block by block and keep the best `top_k`."""
+        rows = candidates if candidates is not None else np.arange(len(self.ids))
+        best_positions = np.zeros(0, dtype=np.int64)
+        best_scores = np.zeros(0, dtype=np.float32)
+
+        for start in range(0, len(rows), SCAN_BLOCK_ROWS):
+            block_rows = rows[start:start + SCAN_BLOCK_ROWS]
+            if candidates is None:
+                block = self.vectors[block_rows[0]:block_rows[-1] + 1]
+            else:
+                block = self.vectors[block_rows]
+            scores = np.asarray(block, dtype=np.float32) @ query
+            best_positions = np.concatenate([best_positions, block_rows])
+            best_scores = np.concatenate([best_scores, scores])
+            if len(best_scores) > top_k:
+                keep = np.argpartition(-best_scores, top_k)[:top_k]
+                best_positions, best_scores = best_positions[keep], best_scores[keep]
+
+        order = np.argsort(-best_scores)
+        return best_positions[order], best_scores[order]
+
+    def _build_ivf(self, iterations: int = 10, seed: int = 0) -> None:
+        """Cluster the vectors with k-means to build the IVF inverted lists."""
+        self._centroids, self._lists = None, None
+        count = len(self.ids)
+        if self.mode != "ivf" or count < 2:
+            return
+
+        nlist = max(1, int(np.sqrt(count)))
+        rng = np.random.default_rng(seed)
+        sample = np.asarray(self.vectors[rng.choice(count, size=min(count, nlist * 64), replace=False)], dtype=np.float32)
+        centroids = sample[rng.choice(len(sample), size=nlist, replace=False)]
+        for _ in range(iterations):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            for c in range(nlist):
+                members = sample[assignment == c]
+                if len(members):
+                    centroids[c] = members.mean(axis=0)
+            centroids = _normalize_rows(centroids)
+
+        assignment = np.concatenate([
+            np.argmax(np.asarray(self.vectors[i:i + SCAN_BLOCK_ROWS], dtype=np.float32) @ centroids.T, axis=1)
+            for i in range(0, count, SCAN_BLOCK_ROWS)
+        ])
+        self._centroids = centroids
+        self._lists = [np.flatnonzero(assignment == c) for c in range(nlist)]
+        logger.info(f"Built IVF index with {nlist} lists over {count} vectors")
+
+    def _probe(self, query: np.ndarray) -> np.ndarray:
+        nprobe = min(self.nprobe, len(self._centroids))
+        nearest = np.argpartition(-(self._centroids @ query), nprobe - 1)[:nprobe]
+        return np.sort(np.concatenate([self._lists[c] for c in nearest]))
+
+
+_local_index = None
+_local_index_lock = threading.Lock()
+
+
+def get_local_index() -> LocalVectorIndex:
+    """Return the shared local index, loading the snapshot on first use."""
+    global _local_index
+    if _local_index is None:
+        with _local_index_lock:
+            if _local_index is None:
+                _local_index = LocalVectorIndex().load()
+    return _local_index
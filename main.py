@@ -1,18 +1,41 @@
 import os
 import time
+
+_import_started = time.perf_counter()
+
 import uuid
+import asyncio
+import threading
 import json
 from datetime import datetime, timedelta
-from flask import Flask, request, jsonify, render_template, redirect, url_for, session
-from queue_utils import start_worker, job_queue, job_results
-from pinecones_utils_openai import query_openai_paragraphs
-from openai_utils import get_chat_completion
+from flask import Flask, Response, request, jsonify, render_template, redirect, url_for, session, stream_with_context
+import metrics_utils
+import http_utils
+from cache_utils import QueryCache
+from embedding_cache import get_embedding_cache
+from metadata_store import get_metadata_store
+from queue_utils import (
+    start_worker, start_async_worker, submit_job, job_results, job_events, JobEvents, get_queue_metrics, QueueFullError
+)
+from lexical_index import get_lexical_index
+from semantic_cache import SemanticCache
+from warm_cache import WarmCache, WARM_CACHE, WARM_CACHE_MAX_AGE, start_warm_cache_refresher
+from pinecones_utils_openai import (
+    hybrid_query_paragraphs, async_hybrid_query_paragraphs, embed_texts_with_openai, async_embed_texts_with_openai,
+    get_vector_index
+)
+from openai_utils import stream_chat_completion, async_stream_chat_completion, get_client as get_openai_client
+from json_stream import JSONArrayStreamParser
+from prompt_builder import PromptContext, contains_span, get_encoding
+from ranking_utils import rank_paragraphs
+from filter_utils import parse_filters, FilterError, FILTER_FIELDS
+from retry_utils import RetryPolicy, Deadline, RetryBudget, run_stage, run_stage_async
+from async_utils import get_event_loop, submit_coroutine, run_coroutine, iterate_async
 from prompts import search_assistant_system_prompt
 from auth_google import auth_bp, oauth  # Import the auth blueprint and OAuth
 
 app = Flask(__name__)
 app.config['TIMEOUT'] = 300  # Increased timeout for long queries
-app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 0
 app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(minutes=5)
 app.secret_key = os.getenv('FLASK_SECRET_KEY')  # Add your secret key
 
@@ -22,109 +45,511 @@ oauth.init_app(app)
 # Register the Authentication Blueprint
 app.register_blueprint(auth_bp, url_prefix='/auth')
 
-# Cache dictionary to store results with timestamps
-query_cache = {}
-CACHE_TIMEOUT = timedelta(minutes=30)
+# Compress responses and fingerprint static URLs so browsers can cache them
+http_utils.init_app(app)
+
+# Cache of verified results, keyed by normalized query
+TOP_K = 10
+FAST_CANDIDATES = 2 * TOP_K  # Paragraphs retrieved in fast mode for re-ranking and diversification
+query_cache = QueryCache()
+semantic_cache = SemanticCache()  # Verified results for paraphrases of recent questions
+warm_cache = WarmCache() if WARM_CACHE else None  # Popular questions, answered ahead of time and kept on disk
+
+# Output cap for quote selection; the model returns paragraph ids, not quotes with metadata.
+# An id with its optional sentence takes up to about 50 tokens, so this fits ten or more selections.
+LLM_MAX_TOKENS = int(os.getenv('LLM_MAX_TOKENS', 800))
+
+# Retry policies for each pipeline stage
+RETRIEVAL_RETRY_POLICY = RetryPolicy(max_attempts=3, base_delay=0.25, max_delay=2.0)
+LLM_RETRY_POLICY = RetryPolicy(max_attempts=3, base_delay=1.0, max_delay=8.0)
+
+# Run queued jobs as coroutines on one event loop instead of a thread per job
+ASYNC_PIPELINE = os.getenv('ASYNC_PIPELINE', '0') == '1'
+
+# Batch queries: questions per request, concurrent retrievals and LLM calls per batch, and background batch jobs at once
+BATCH_MAX_QUESTIONS = int(os.getenv('BATCH_MAX_QUESTIONS', 500))
+BATCH_RETRIEVAL_CONCURRENCY = int(os.getenv('BATCH_RETRIEVAL_CONCURRENCY', 32))
+BATCH_LLM_CONCURRENCY = int(os.getenv('BATCH_LLM_CONCURRENCY', 8))
+BATCH_MAX_JOBS = int(os.getenv('BATCH_MAX_JOBS', 2))
+batch_job_slots = threading.BoundedSemaphore(BATCH_MAX_JOBS)
+
+# Seconds between keep-alive comments while a streamed query waits for its job
+STREAM_KEEPALIVE = float(os.getenv('STREAM_KEEPALIVE', 15))
+
+# Include each job's stage timings in /status responses
+STATUS_DEBUG = os.getenv('STATUS_DEBUG', '0') == '1'
+
+# Startup: connect and load indexes in the background, and warn when imports are slow
+WARMUP_ON_START = os.getenv('WARMUP_ON_START', '1') == '1'
+IMPORT_TIME_BUDGET = float(os.getenv('IMPORT_TIME_BUDGET', 1.0))
+warmup_state = {'status': 'pending' if WARMUP_ON_START else 'disabled', 'steps': {}}
+
+
+def format_quote(metadata):
+    """Build the quote payload returned to clients from paragraph metadata."""
+    return {
+        'speaker': metadata['speaker'],
+        'role': metadata['role'],
+        'title': metadata['title'],
+        'youtube_link': metadata['youtube_link'],
+        'paragraph_deep_link': metadata['paragraph_deep_link'],
+        'paragraph_text': metadata['paragraph_text'],
+        'start_time': int(metadata['start_time']),
+        'end_time': int(metadata['end_time']),
+    }
+
+
+def resolve_quotes(selections, context, seen_ids=None):
+    """
+    Rehydrate the LLM's selections into quotes with the metadata of the retrieved paragraphs.
+    A selection names a paragraph by local id and may carry a `quote` span. A span that is not
+    in the named paragraph, or that comes without a known id, is matched with the quote verifier.
+    """
+    seen_ids = set() if seen_ids is None else seen_ids
+    resolved = []
+
+    for selection in selections:
+        if not isinstance(selection, dict):
+            print(f"✗ Unexpected selection: {str(selection)[:50]}")
+            continue
+        source = context.lookup(selection.get('id'))
+        span = str(selection.get('quote') or selection.get('paragraph_text') or '').strip()
+        if span and (source is None or not contains_span(source, span)):
+            source = context.verifier.match(span) or source
+
+        if source and source['id'] not in seen_ids:
+            seen_ids.add(source['id'])
+            quote = format_quote(source['metadata'])
+            if span and contains_span(source, span):
+                quote['highlight'] = span
+            resolved.append(quote)
+            print(f"✓ Verified quote: {quote['paragraph_text'][:50]}...")
+        elif source:
+            print(f"✗ Duplicate quote: {selection.get('id') or span[:50]}")
+        else:
+            print(f"✗ Unverified quote: {selection.get('id') or span[:50]}")
+
+    return resolved
 
 
-def get_cached_query_results(query, top_k):
-    """Retrieve cached results if they exist and haven't expired."""
-    cache_key = f"{query}_{top_k}"
-    if cache_key in query_cache:
-        timestamp, results = query_cache[cache_key]
-        if datetime.now() - timestamp < CACHE_TIMEOUT:
-            print(f"[INFO] Cache hit for query: {query}")
-            return results
-    return None
+class StreamedQuoteVerifier:
+    """
+    Parse a streamed LLM response and resolve each selection as soon as its JSON object closes.
+    Time to first token, parsing and verification time and token usage are added to `timings`.
+    """
+
+    def __init__(self, context, timings=None):
+        self.context = context
+        self.parser = JSONArrayStreamParser()
+        self.seen_ids = set()
+        self.verified_count = 0
+        self.timings = {} if timings is None else timings
+        self.timings['context_tokens'] = context.context_tokens
+        self.usage = {}
+        self.started = time.monotonic()
+
+    def feed(self, chunk):
+        """Return the quotes verified from this chunk."""
+        fed = time.monotonic()
+        self.timings.setdefault('llm_first_token', round(fed - self.started, 4))
+        selections = self.parser.feed(chunk)
+        parsed = time.monotonic()
+        verified = resolve_quotes(selections, self.context, self.seen_ids)
+        self.timings['json_parse'] = round(self.timings.get('json_parse', 0) + parsed - fed, 4)
+        self.timings['verify'] = round(self.timings.get('verify', 0) + time.monotonic() - parsed, 4)
+        self.verified_count += len(verified)
+        return verified
+
+    def record_usage(self):
+        for kind, count in self.usage.items():
+            self.timings[kind] = self.timings.get(kind, 0) + count
+
+    def stream_failed(self, error):
+        """Keep the quotes verified before the stream failed, or re-raise if there are none."""
+        self.record_usage()
+        if not self.verified_count:
+            raise error
+        print(f"[WARN] LLM stream failed after {self.verified_count} verified quotes, keeping them: {error}")
+
+    def finish(self):
+        self.record_usage()
+        if not self.parser.finished:
+            if not self.verified_count:
+                raise ValueError("GPT output is not a JSON array")
+            if self.usage.get('completion_tokens', 0) >= LLM_MAX_TOKENS:
+                print(f"[WARN] GPT output reached LLM_MAX_TOKENS ({LLM_MAX_TOKENS}), keeping {self.verified_count} verified quotes")
+            else:
+                print(f"[WARN] GPT output was truncated or malformed, keeping {self.verified_count} verified quotes")
 
 
-def cache_query_results(query, top_k, results):
-    """Cache the query results with a timestamp."""
-    cache_key = f"{query}_{top_k}"
-    query_cache[cache_key] = (datetime.now(), results)
-    print(f"[INFO] Cached results for query: {query}")
+def llm_request(context):
+    """Arguments of the quote-selection chat completion."""
+    return {
+        'system_prompt': search_assistant_system_prompt,
+        'user_prompt': context.prompt,
+        'model': "gpt-4o",
+        'temperature': 0.7,
+        'max_tokens': LLM_MAX_TOKENS,
+        'retries': 1,
+    }
 
 
-def verify_response(quotes, original_paragraphs):
-    """Verify GPT output by matching paragraph text to metadata."""
+def iter_verified_quotes(user_message, relevant_paragraphs, timings=None):
+    """
+    Stream the LLM response and yield each quote as soon as its JSON object closes and is verified.
+    Malformed or truncated output keeps the quotes parsed so far instead of discarding them.
+    """
+    context = PromptContext(user_message, relevant_paragraphs)
+    stream = StreamedQuoteVerifier(context, timings)
+    try:
+        for chunk in stream_chat_completion(**llm_request(context), usage=stream.usage):
+            yield from stream.feed(chunk)
+    except Exception as e:
+        stream.stream_failed(e)
+        return
+    stream.finish()
+
+
+async def aiter_verified_quotes(user_message, relevant_paragraphs, timings=None):
+    """Async counterpart of `iter_verified_quotes`."""
+    # Counting tokens may load (or download) the tokenizer, so build the prompt off the event loop
+    context = await asyncio.to_thread(PromptContext, user_message, relevant_paragraphs)
+    stream = StreamedQuoteVerifier(context, timings)
+    try:
+        async for chunk in async_stream_chat_completion(**llm_request(context), usage=stream.usage):
+            for verified in stream.feed(chunk):
+                yield verified
+    except Exception as e:
+        stream.stream_failed(e)
+        return
+    stream.finish()
+
+
+def retrieve_paragraphs(user_message, timings=None, top_k=TOP_K, filters=None, query_embedding=None):
+    """Retrieval stage: fetch the closest paragraphs by vector and lexical search."""
+    relevant_paragraphs = hybrid_query_paragraphs(
+        query=user_message, top_k=top_k, timings=timings, filters=filters, query_embedding=query_embedding
+    )
+    if not relevant_paragraphs:
+        raise Exception('No relevant paragraphs found')
+    return relevant_paragraphs
+
+
+def select_quotes(user_message, relevant_paragraphs, timings=None, events=None):
+    """
+    LLM stage: select quotes from the retrieved paragraphs and verify them.
+    Each verified quote is published to `events` as soon as it is verified. A failed attempt has
+    verified no quotes, so a retry never publishes a quote twice.
+    """
     verified_quotes = []
-    original_dict = {}
-
-    # Build a dictionary of original paragraphs for matching
-    for p in original_paragraphs:
-        text = p['metadata']['paragraph_text']
-        original_dict[text.strip()] = p['metadata']
-        clean_text = ''.join(c for c in text if c.isalnum() or c.isspace()).strip()
-        original_dict[clean_text] = p['metadata']
-
-    for quote in quotes:
-        quote_text = quote.get('paragraph_text', '').strip()
-        clean_quote = ''.join(c for c in quote_text if c.isalnum() or c.isspace()).strip()
-        original_meta = original_dict.get(quote_text) or original_dict.get(clean_quote)
-
-        if original_meta:
-            verified_quotes.append({
-                'speaker': original_meta['speaker'],
-                'role': original_meta['role'],
-                'title': original_meta['title'],
-                'youtube_link': original_meta['youtube_link'],
-                'paragraph_deep_link': original_meta['paragraph_deep_link'],
-                'paragraph_text': original_meta['paragraph_text'],
-                'start_time': int(original_meta['start_time']),
-                'end_time': int(original_meta['end_time']),
-            })
-            print(f"✓ Verified quote: {quote_text[:50]}...")
-        else:
-            print(f"✗ Unverified quote: {quote_text[:50]}...")
+    for quote in iter_verified_quotes(user_message, relevant_paragraphs, timings):
+        verified_quotes.append(quote)
+        if events is not None:
+            events.publish('quote', quote)
+    if not verified_quotes:
+        raise ValueError('No verified quotes in GPT output')
+    return verified_quotes
+
+
+def embed_query(user_message):
+    """Embedding stage: embed the question once for the semantic cache and the vector query."""
+    return embed_texts_with_openai([user_message])[0]
 
+
+async def retrieve_paragraphs_async(user_message, timings=None, filters=None, query_embedding=None):
+    """Async counterpart of `retrieve_paragraphs`."""
+    relevant_paragraphs = await async_hybrid_query_paragraphs(
+        user_message, top_k=TOP_K, timings=timings, filters=filters, query_embedding=query_embedding
+    )
+    if not relevant_paragraphs:
+        raise Exception('No relevant paragraphs found')
+    return relevant_paragraphs
+
+
+async def select_quotes_async(user_message, relevant_paragraphs, timings=None, events=None):
+    """Async counterpart of `select_quotes`."""
+    verified_quotes = []
+    async for quote in aiter_verified_quotes(user_message, relevant_paragraphs, timings):
+        verified_quotes.append(quote)
+        if events is not None:
+            events.publish('quote', quote)
+    if not verified_quotes:
+        raise ValueError('No verified quotes in GPT output')
     return verified_quotes
 
 
-def process_query(user_message):
-    """Process a single query and return verified quotes."""
-    top_k = 10
-    retries = 3
+def publish_paragraphs(events, relevant_paragraphs):
+    if events is not None:
+        events.publish('paragraphs', [format_quote(p['metadata']) for p in relevant_paragraphs])
+
 
-    for attempt in range(retries):
+def publish_quotes(events, quotes):
+    if events is not None:
+        for quote in quotes:
+            events.publish('quote', quote)
+
+
+def process_query(user_message, timings=None, filters=None, events=None):
+    """
+    Process a single query and return verified quotes.
+    Paraphrases of recently answered questions are served from the semantic cache.
+    Each stage retries on its own, so LLM retries reuse the retrieved paragraphs.
+    With `events`, the retrieved paragraphs and each verified quote are published as they become available.
+    """
+    timings = {} if timings is None else timings
+    deadline = Deadline()
+    budget = RetryBudget()
+    try:
+        query_embedding = run_stage(
+            'embedding', lambda: embed_query(user_message), RETRIEVAL_RETRY_POLICY, deadline, budget, timings
+        )
+        cached_results = semantic_cache.get(query_embedding, TOP_K, filters)
+        if cached_results:
+            print(f"[INFO] Semantic cache hit for query: {user_message}")
+            publish_quotes(events, cached_results)
+            return cached_results
+        relevant_paragraphs = run_stage(
+            'retrieval', lambda: retrieve_paragraphs(user_message, timings, filters=filters, query_embedding=query_embedding),
+            RETRIEVAL_RETRY_POLICY, deadline, budget, timings
+        )
+        publish_paragraphs(events, relevant_paragraphs)
+        verified_quotes = run_stage(
+            'llm', lambda: select_quotes(user_message, relevant_paragraphs, timings, events),
+            LLM_RETRY_POLICY, deadline, budget, timings
+        )
+        semantic_cache.set(query_embedding, TOP_K, verified_quotes, filters)
+        return verified_quotes
+    finally:
+        print(f"[INFO] Stage timings for '{user_message[:50]}': {timings}")
+
+
+async def process_query_async(user_message, timings=None, filters=None, events=None):
+    """
+    Async counterpart of `process_query`, run on the shared event loop.
+    No thread is held while waiting on OpenAI or Pinecone, so one process can keep
+    many queries in flight.
+    """
+    timings = {} if timings is None else timings
+    deadline = Deadline()
+    budget = RetryBudget()
+
+    async def embed():
+        return (await async_embed_texts_with_openai([user_message]))[0]
+
+    try:
+        query_embedding = await run_stage_async('embedding', embed, RETRIEVAL_RETRY_POLICY, deadline, budget, timings)
+        cached_results = semantic_cache.get(query_embedding, TOP_K, filters)
+        if cached_results:
+            print(f"[INFO] Semantic cache hit for query: {user_message}")
+            publish_quotes(events, cached_results)
+            return cached_results
+        relevant_paragraphs = await run_stage_async(
+            'retrieval', lambda: retrieve_paragraphs_async(user_message, timings, filters, query_embedding),
+            RETRIEVAL_RETRY_POLICY, deadline, budget, timings
+        )
+        publish_paragraphs(events, relevant_paragraphs)
+        verified_quotes = await run_stage_async(
+            'llm', lambda: select_quotes_async(user_message, relevant_paragraphs, timings, events),
+            LLM_RETRY_POLICY, deadline, budget, timings
+        )
+        semantic_cache.set(query_embedding, TOP_K, verified_quotes, filters)
+        return verified_quotes
+    finally:
+        print(f"[INFO] Stage timings for '{user_message[:50]}': {timings}")
+
+
+def batch_result(question, result=None, error=None, cached=False):
+    """Result of one question of a batch, as returned by `/query/batch`."""
+    if error is not None:
+        return {'question': question, 'status': 'error', 'error': str(error)}
+    return {'question': question, 'status': 'complete', 'response_text': result, 'cached': cached}
+
+
+async def aiter_batch_results(questions, filters=None, timings=None):
+    """
+    Answer many questions, yielding `(index, result)` pairs in the order they finish.
+    Repeated questions are answered once and cached ones straight away. The rest are embedded
+    in one request and checked against the semantic cache, then retrieved concurrently and
+    passed to the LLM at most BATCH_LLM_CONCURRENCY at a time.
+    """
+    timings = {} if timings is None else timings
+    positions = {}
+    for index, question in enumerate(questions):
+        positions.setdefault(QueryCache.make_key(question, TOP_K, filters), []).append(index)
+
+    pending = []
+    for indices in positions.values():
+        cached_results = query_cache.get(questions[indices[0]], TOP_K, filters)
+        if cached_results:
+            for index in indices:
+                yield index, batch_result(questions[index], cached_results, cached=True)
+        else:
+            pending.append(indices)
+    if not pending:
+        return
+
+    unique_questions = [questions[indices[0]] for indices in pending]
+    try:
+        query_embeddings = await run_stage_async(
+            'embedding', lambda: async_embed_texts_with_openai(unique_questions, batch_size=len(unique_questions)),
+            RETRIEVAL_RETRY_POLICY, Deadline(), RetryBudget(), timings
+        )
+    except Exception as e:
+        print(f"[ERROR] Embedding a batch of {len(unique_questions)} questions failed: {e}")
+        for indices in pending:
+            for index in indices:
+                yield index, batch_result(questions[index], error=e)
+        return
+
+    retrieval_slots = asyncio.Semaphore(BATCH_RETRIEVAL_CONCURRENCY)
+    llm_slots = asyncio.Semaphore(BATCH_LLM_CONCURRENCY)
+
+    async def answer(indices, question, query_embedding):
+        question_timings = {}
         try:
-            relevant_paragraphs = query_openai_paragraphs(query=user_message, top_k=top_k)
-            if not relevant_paragraphs:
-                raise Exception('No relevant paragraphs found')
-
-            user_prompt = (
-                "Relevant paragraphs with metadata:\n\n" +
-                "\n\n".join([
-                    f"Speaker: {p['metadata'].get('speaker', '')}\n"
-                    f"Role: {p['metadata'].get('role', '')}\n"
-                    f"Title: {p['metadata'].get('title', '')}\n"
-                    f"Link: {p['metadata'].get('youtube_link', '')}\n"
-                    f"DeepLink: {p['metadata'].get('paragraph_deep_link', '')}\n"
-                    f"Text: {p['paragraph_text']}"
-                    for p in relevant_paragraphs
-                ]) +
-                f"\n\nUser question: {user_message}\n\n"
-                "Return ONLY a raw JSON array with exact quotes and metadata - no markdown or code blocks."
-            )
-
-            response_text = get_chat_completion(
-                system_prompt=search_assistant_system_prompt,
-                user_prompt=user_prompt,
-                model="gpt-4o",
-                temperature=0.7,
-                max_tokens=2000
-            )
-            quotes = json.loads(response_text)
-            if not isinstance(quotes, list):
-                raise ValueError("GPT output is not a JSON array")
-            
-            verified_quotes = verify_response(quotes, relevant_paragraphs)
-            if verified_quotes:
-                return verified_quotes
+            cached_results = semantic_cache.get(query_embedding, TOP_K, filters)
+            if cached_results:
+                return indices, cached_results, True
+            deadline = Deadline()
+            budget = RetryBudget()
+            async with retrieval_slots:
+                relevant_paragraphs = await run_stage_async(
+                    'retrieval', lambda: retrieve_paragraphs_async(question, question_timings, filters, query_embedding),
+                    RETRIEVAL_RETRY_POLICY, deadline, budget, question_timings
+                )
+            async with llm_slots:
+                # A paraphrase answered earlier in the batch may be cached by now
+                cached_results = semantic_cache.get(query_embedding, TOP_K, filters)
+                if cached_results:
+                    return indices, cached_results, True
+                verified_quotes = await run_stage_async(
+                    'llm', lambda: select_quotes_async(question, relevant_paragraphs, question_timings),
+                    LLM_RETRY_POLICY, deadline, budget, question_timings
+                )
+            query_cache.set(question, TOP_K, verified_quotes, filters)
+            semantic_cache.set(query_embedding, TOP_K, verified_quotes, filters)
+            return indices, verified_quotes, False
         except Exception as e:
-            print(f"[ERROR] Attempt {attempt + 1} failed: {e}")
-            if attempt == retries - 1:
-                raise
-            time.sleep(2)
+            print(f"[ERROR] Batch question '{question[:50]}' failed: {e}")
+            return indices, e, False
+        finally:
+            metrics_utils.observe_timings(question_timings)
+
+    tasks = [
+        asyncio.ensure_future(answer(indices, question, query_embedding))
+        for indices, question, query_embedding in zip(pending, unique_questions, query_embeddings)
+    ]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            indices, outcome, cached = await next_done
+            for index in indices:
+                if isinstance(outcome, Exception):
+                    yield index, batch_result(questions[index], error=outcome)
+                else:
+                    yield index, batch_result(questions[index], outcome, cached=cached)
+    finally:
+        # Stop the remaining questions when the consumer goes away
+        for task in tasks:
+            task.cancel()
+
+
+async def process_batch_async(questions, filters=None, timings=None):
+    """Answer every question of a batch and return the results in question order."""
+    results = [None] * len(questions)
+    async for index, result in aiter_batch_results(questions, filters, timings):
+        results[index] = result
+        if result['status'] == 'complete':
+            metrics_utils.queries_served.inc(mode='batch', cached=str(result['cached']).lower())
+    return results
+
+
+def process_batch(questions, filters=None, timings=None):
+    """Blocking counterpart of `process_batch_async` for scripts and batch exports."""
+    return run_coroutine(process_batch_async(questions, filters, timings))
+
+
+def fast_search(user_message, timings=None, filters=None):
+    """
+    Low-latency search without the LLM: the retrieved paragraphs are re-ranked locally
+    and returned directly, so every result is an exact paragraph.
+    """
+    timings = {} if timings is None else timings
+    relevant_paragraphs = run_stage(
+        'retrieval', lambda: retrieve_paragraphs(user_message, timings, top_k=FAST_CANDIDATES, filters=filters),
+        RETRIEVAL_RETRY_POLICY, Deadline(), RetryBudget(), timings
+    )
+    ranked = rank_paragraphs(user_message, relevant_paragraphs, top_k=TOP_K)
+    return [format_quote(p['metadata']) for p in ranked]
+
+
+def iter_result_events(results, cached=False):
+    """Events of a query whose results are already known."""
+    for quote in results:
+        yield 'quote', quote
+    yield 'done', {'count': len(results), 'cached': cached}
+
+
+def iter_fast_events(user_message, filters=None, timings=None):
+    """Events of a fast mode query, which is answered in the request like `/query` does."""
+    yield from iter_result_events(fast_search(user_message, timings, filters=filters))
+
+
+def start_query_job(user_message, filters=None):
+    """
+    Queue an LLM query, or join the job of an identical query already in flight.
+    Returns the id of the job to follow; while it runs, its progress is published to `job_events`.
+    Raises QueueFullError when the queue is at capacity.
+    """
+    job_id = str(uuid.uuid4())
+    events = JobEvents()
+    # Register the events before claiming, so a client joining this job can always find them
+    job_events[job_id] = events
+    owner_id = query_cache.claim(user_message, TOP_K, job_id, filters)
+    if owner_id != job_id:
+        del job_events[job_id]
+        print(f"[INFO] Joined in-flight job {owner_id}")
+        return owner_id
+
+    try:
+        submit_job(job_id, user_message, filters=filters, events=events)
+    except QueueFullError:
+        query_cache.release(user_message, TOP_K, job_id, filters)
+        del job_events[job_id]
+        events.publish('error', {'error': 'The server is busy. Please try again shortly.'})
+        events.close()
+        raise
+    return job_id
+
+
+def iter_job_events(job_id, idle_timeout=STREAM_KEEPALIVE):
+    """
+    Relay the events of a job as it publishes them; a job that has already finished is
+    replayed from its stored result. Yields `(None, None)` while the job is quiet.
+    """
+    events = job_events.get(job_id)
+    if events is not None:
+        yield from events.subscribe(idle_timeout)
+        return
+    result = job_results.get(job_id)
+    if result is None:
+        yield 'error', {'error': 'Job not found'}
+    elif result['status'] == 'complete':
+        yield from iter_result_events(result['data'])
+    else:
+        yield 'error', {'error': result.get('error', 'Job did not finish')}
+
+
+def busy_response(error):
+    """503 for a query rejected because the job queue is full."""
+    print(f"[WARN] Rejected query, {error}")
+    response = jsonify({'error': 'The server is busy. Please try again shortly.'})
+    response.headers['Retry-After'] = '5'
+    return response, 503
+
+
+def format_sse(event, data):
+    """Encode one Server-Sent Events message."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
 
 
 @app.route('/')
@@ -149,42 +574,330 @@ def ask():
     """Submit a query to the job queue."""
     data = request.get_json()
     user_message = (data.get('question') or "").strip()
+    mode = data.get('mode') or request.args.get('mode') or 'llm'
 
     if not user_message:
         return jsonify({'error': 'Question cannot be empty'}), 400
-
-    print(f"\n[{datetime.now()}] Query: {user_message}")
+    if mode not in ('llm', 'fast'):
+        return jsonify({'error': f"Unknown mode: {mode}"}), 400
+    try:
+        filters = parse_filters(data.get('filters'))
+    except FilterError as e:
+        return jsonify({'error': str(e)}), 400
+
+    print(f"\n[{datetime.now()}] Query ({mode}): {user_message}")
+    if warm_cache is not None and mode == 'llm':
+        warm_cache.record(user_message, filters)
+
+    # Fast mode skips the LLM and answers synchronously
+    if mode == 'fast':
+        timings = {}
+        try:
+            quotes = fast_search(user_message, timings, filters=filters)
+        except Exception as e:
+            print(f"[ERROR] Fast search failed: {e}")
+            return jsonify({'error': str(e)}), 500
+        finally:
+            metrics_utils.observe_timings(timings)
+        metrics_utils.queries_served.inc(mode='fast', cached='false')
+        return jsonify({'response_text': quotes})
 
     # Check cache first
-    cached_results = get_cached_query_results(user_message, top_k=10)
+    cached_results = query_cache.get(user_message, TOP_K, filters)
     if cached_results:
+        print(f"[INFO] Cache hit for query: {user_message}")
+        metrics_utils.queries_served.inc(mode='llm', cached='true')
         return jsonify({'response_text': cached_results})
 
-    job_id = str(uuid.uuid4())
-    job_results[job_id] = {'status': 'pending'}
-    job_queue.put((job_id, user_message))
+    # Share the pipeline run of an identical query that is already in flight
+    try:
+        job_id = start_query_job(user_message, filters)
+    except QueueFullError as e:
+        return busy_response(e)
+
+    return jsonify({'job_id': job_id})
+
+
+@app.route('/stream', methods=['GET'])
+def stream():
+    """
+    Run a query and stream paragraphs and verified quotes as Server-Sent Events.
+    LLM queries run as jobs on the worker pool like `/query`, sharing its queue limit, timeout
+    and in-flight deduplication; this request only relays the job's events.
+    """
+    user_message = (request.args.get('question') or "").strip()
+    mode = request.args.get('mode') or 'llm'
+
+    if not user_message:
+        return jsonify({'error': 'Question cannot be empty'}), 400
+    if mode not in ('llm', 'fast'):
+        return jsonify({'error': f"Unknown mode: {mode}"}), 400
+    try:
+        filters = parse_filters({k: request.args[k] for k in FILTER_FIELDS if k in request.args})
+    except FilterError as e:
+        return jsonify({'error': str(e)}), 400
+
+    print(f"\n[{datetime.now()}] Streaming query ({mode}): {user_message}")
+    if warm_cache is not None and mode == 'llm':
+        warm_cache.record(user_message, filters)
+
+    timings = {}
+    if mode == 'fast':
+        events = iter_fast_events(user_message, filters, timings)
+    else:
+        cached_results = query_cache.get(user_message, TOP_K, filters)
+        if cached_results:
+            print(f"[INFO] Cache hit for query: {user_message}")
+            events = iter_result_events(cached_results, cached=True)
+        else:
+            try:
+                events = iter_job_events(start_query_job(user_message, filters))
+            except QueueFullError as e:
+                return busy_response(e)
+
+    def generate():
+        try:
+            for event, data in events:
+                if event is None:
+                    # Keep proxies from closing the connection while the job is queued
+                    yield ": keep-alive\n\n"
+                    continue
+                # Queries answered by a job are counted when the job finishes
+                if event == 'done' and (mode == 'fast' or data['cached']):
+                    metrics_utils.queries_served.inc(mode=mode, cached=str(data['cached']).lower())
+                yield format_sse(event, data)
+        except Exception as e:
+            print(f"[ERROR] Streaming query failed: {e}")
+            yield format_sse('error', {'error': str(e)})
+        finally:
+            metrics_utils.observe_timings(timings)
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
 
+
+@app.route('/query/batch', methods=['POST'])
+def ask_batch():
+    """
+    Answer a list of questions in one request.
+    With `"stream": true` each result is streamed as a Server-Sent Event as soon as it is ready;
+    otherwise the batch runs as one job whose results are returned by `/status/<job_id>`.
+    """
+    data = request.get_json() or {}
+    questions = data.get('questions')
+    if not isinstance(questions, list) or not questions:
+        return jsonify({'error': 'Questions must be a non-empty list'}), 400
+    if len(questions) > BATCH_MAX_QUESTIONS:
+        return jsonify({'error': f"A batch can hold at most {BATCH_MAX_QUESTIONS} questions"}), 400
+    if not all(isinstance(q, str) and q.strip() for q in questions):
+        return jsonify({'error': 'Questions cannot be empty'}), 400
+    questions = [q.strip() for q in questions]
+    try:
+        filters = parse_filters(data.get('filters'))
+    except FilterError as e:
+        return jsonify({'error': str(e)}), 400
+
+    print(f"\n[{datetime.now()}] Batch of {len(questions)} questions (stream={bool(data.get('stream'))})")
+
+    if data.get('stream'):
+        def generate():
+            summary = {'count': 0, 'failed': 0, 'cached': 0}
+            timings = {}
+            try:
+                for index, result in iterate_async(aiter_batch_results(questions, filters, timings)):
+                    summary['count'] += 1
+                    if result['status'] == 'complete':
+                        summary['cached'] += result['cached']
+                        metrics_utils.queries_served.inc(mode='batch', cached=str(result['cached']).lower())
+                    else:
+                        summary['failed'] += 1
+                    yield format_sse('result', dict(result, index=index))
+                yield format_sse('done', summary)
+            except Exception as e:
+                print(f"[ERROR] Streaming batch failed: {e}")
+                yield format_sse('error', {'error': str(e)})
+            finally:
+                metrics_utils.observe_timings(timings)
+
+        return Response(
+            stream_with_context(generate()),
+            mimetype='text/event-stream',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        )
+
+    # Streamed batches are bounded by their connections; background batches by a fixed number of slots
+    if not batch_job_slots.acquire(blocking=False):
+        response = jsonify({'error': 'Too many batches are running. Please try again shortly.'})
+        response.headers['Retry-After'] = '30'
+        return response, 503
+
+    job_id = str(uuid.uuid4())
+    job_results.set(job_id, {'status': 'pending'})
+    submit_coroutine(run_batch_job(job_id, questions, filters))
     return jsonify({'job_id': job_id})
 
 
+async def run_batch_job(job_id, questions, filters):
+    """Run a batch submitted to `/query/batch` and store its results for `/status`."""
+    started = time.monotonic()
+    timings = {}
+    try:
+        results = await process_batch_async(questions, filters, timings)
+        outcome = {'status': 'complete', 'data': results}
+    except Exception as e:
+        print(f"[ERROR] Batch job {job_id} failed: {e}")
+        outcome = {'status': 'error', 'error': str(e)}
+    finally:
+        batch_job_slots.release()
+    timings['job'] = round(time.monotonic() - started, 4)
+    outcome['timings'] = timings
+    # The job store may be SQLite; keep the write off the event loop
+    await asyncio.to_thread(job_results.set, job_id, outcome)
+    metrics_utils.jobs_finished.inc(status=outcome['status'])
+
+
 @app.route('/status/<job_id>', methods=['GET'])
 def job_status(job_id):
     """Check the status of a job and return results if complete."""
-    if job_id not in job_results:
+    result = job_results.get(job_id)
+    if result is None:
         return jsonify({'error': 'Job not found'}), 404
 
-    result = job_results[job_id]
     if result['status'] == 'complete':
-        # Cache the completed result
-        cache_query_results(result.get('query', ''), 10, result['data'])
-        return jsonify({'status': 'complete', 'response_text': result['data']})
+        payload = {'status': 'complete', 'response_text': result['data']}
     elif result['status'] == 'error':
-        return jsonify({'status': 'error', 'error': result['error']})
-    return jsonify({'status': 'pending'})
+        payload = {'status': 'error', 'error': result['error']}
+    else:
+        payload = {'status': 'pending'}
+    if STATUS_DEBUG or app.debug:
+        payload['timings'] = result.get('timings', {})
+    return http_utils.cache_result_response(jsonify(payload), payload['status'] == 'complete')
+
+
+@app.route('/stats', methods=['GET'])
+def stats():
+    """Report queue depth, worker utilisation and cache statistics."""
+    return jsonify({
+        'queue': get_queue_metrics(),
+        'job_store': job_results.stats(),
+        'warmup': warmup_state,
+        'query_cache': query_cache.stats(),
+        'semantic_cache': semantic_cache.stats(),
+        'embedding_cache': get_embedding_cache().stats(),
+        'metadata_store': get_metadata_store().stats() if get_metadata_store() else None,
+        'warm_cache': warm_cache.stats() if warm_cache is not None else None,
+    })
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Expose latency histograms, retries, token counts, queue and cache gauges for Prometheus."""
+    queue = get_queue_metrics()
+    metrics_utils.queue_depth.set(queue['queue_depth'])
+    metrics_utils.busy_workers.set(queue['busy_workers'])
+    query_stats = query_cache.stats()
+    embedding_stats = get_embedding_cache().stats()
+    metrics_utils.cache_hit_ratio.set(query_stats['hit_ratio'], cache='query')
+    metrics_utils.cache_size.set(query_stats['size'], cache='query')
+    semantic_stats = semantic_cache.stats()
+    metrics_utils.cache_hit_ratio.set(semantic_stats['hit_ratio'], cache='semantic')
+    metrics_utils.cache_size.set(semantic_stats['size'], cache='semantic')
+    metrics_utils.cache_hit_ratio.set(embedding_stats['hit_ratio'], cache='embedding')
+    metrics_utils.cache_size.set(embedding_stats['memory_size'], cache='embedding')
+    return Response(metrics_utils.render_metrics(), mimetype='text/plain; version=0.0.4')
+
+
+def finish_job(job_id, user_message, outcome, filters=None, events=None):
+    """Cache completed results, release the in-flight marker for the query and end its event stream."""
+    if outcome['status'] == 'complete':
+        metrics_utils.queries_served.inc(mode='llm', cached='false')
+    if outcome['status'] == 'complete' and outcome['data']:
+        query_cache.set(user_message, TOP_K, outcome['data'], filters)
+        print(f"[INFO] Cached results for query: {user_message}")
+    query_cache.release(user_message, TOP_K, job_id, filters)
+    if events is not None:
+        if outcome['status'] == 'complete':
+            events.publish('done', {'count': len(outcome['data']), 'cached': False})
+        else:
+            events.publish('error', {'error': outcome['error']})
+        events.close()
+    job_events.pop(job_id, None)
+
+
+def publish_warm_result(query, filters, results, ttl=WARM_CACHE_MAX_AGE):
+    """Serve a precomputed answer from the query cache until the next refresh replaces it."""
+    query_cache.set(query, TOP_K, results, filters, ttl=ttl)
+
+
+def queries_waiting():
+    """Whether user queries are queued or most workers are busy; precomputation waits for them."""
+    queue = get_queue_metrics()
+    return queue['queue_depth'] > 0 or queue['utilisation'] >= 0.5
+
 
+def load_warm_cache():
+    """Serve the answers precomputed before the restart, then keep them fresh in the background."""
+    if warm_cache is None:
+        return
+    answers = warm_cache.load()
+    for query, filters, results, age in answers:
+        publish_warm_result(query, filters, results, ttl=WARM_CACHE_MAX_AGE - age)
+    print(f"[INFO] Loaded {len(answers)} precomputed answers")
+    start_warm_cache_refresher(
+        warm_cache, lambda query, filters: process_query(query, filters=filters), publish_warm_result, queries_waiting
+    )
 
-# Start the background worker thread
-start_worker(process_query)
+
+def warm_up():
+    """
+    Connect to the vector index, load the local indexes, create the OpenAI client and load the
+    tokenizer so the first queries do not pay for them. Runs while
+    the server already accepts requests; anything that fails here is retried lazily on first use.
+    """
+    started = time.monotonic()
+    steps = (
+        ('vector_index', get_vector_index),
+        ('lexical_index', get_lexical_index),
+        ('embedding_cache', get_embedding_cache),
+        ('metadata_store', get_metadata_store),
+        ('openai_client', get_openai_client),
+        ('tokenizer', get_encoding),
+    )
+    failed = False
+    for name, step in steps:
+        step_started = time.monotonic()
+        try:
+            step()
+        except Exception as e:
+            failed = True
+            warmup_state['error'] = f"{name}: {e}"
+            print(f"[WARN] Warm-up step '{name}' failed: {e}")
+        warmup_state['steps'][name] = round(time.monotonic() - step_started, 4)
+    warmup_state['seconds'] = round(time.monotonic() - started, 4)
+    warmup_state['status'] = 'degraded' if failed else 'ready'
+    print(f"[INFO] Warm-up {warmup_state['status']} in {warmup_state['seconds']}s: {warmup_state['steps']}")
+
+
+# Start the background worker pool
+if ASYNC_PIPELINE:
+    start_async_worker(process_query_async, get_event_loop(), on_complete=finish_job)
+else:
+    start_worker(process_query, on_complete=finish_job)
+
+# Serve the saved answers and keep flushing query counts whether or not the rest is warmed up
+load_warm_cache()
+
+if WARMUP_ON_START:
+    threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+
+_import_seconds = time.perf_counter() - _import_started
+if _import_seconds > IMPORT_TIME_BUDGET:
+    print(f"[WARN] Importing the app took {_import_seconds:.2f}s, over the {IMPORT_TIME_BUDGET:g}s budget")
+else:
+    print(f"[INFO] App imported in {_import_seconds:.2f}s")
 
 # Application entry point (for local testing and Gunicorn)
 if __name__ == '__main__':
@@ -0,0 +1,166 @@
+import os
+import sys
+import threading
+import logging
+from typing import Dict, Iterable, List, Tuple
+from sqlite_utils import SQLiteConnections
+
+logger = logging.getLogger(__name__)
+
+# Metadata store configuration (an empty path disables the store and queries fetch metadata from the index)
+METADATA_STORE_PATH = os.getenv("METADATA_STORE_PATH", "cache/metadata.sqlite3")
+METADATA_STORE_MMAP_SIZE = int(os.getenv("METADATA_STORE_MMAP_SIZE", 256 * 2 ** 20))
+
+TALK_FIELDS = ("speaker", "role", "title", "youtube_link")
+PARAGRAPH_FIELDS = ("paragraph_deep_link", "paragraph_text", "paragraph_index", "start_time", "end_time")
+_LOOKUP_CHUNK = 500  # Stay well under SQLite's bound-parameter limit
+
+
+class MetadataStore:
+    """
+    Paragraph metadata keyed by vector id, so vector queries can return ids and scores only.
+    Talk-level fields (speaker, role, title, YouTube link) are stored once per talk and held in
+    memory as interned strings; paragraph rows live in a memory-mapped SQLite file.
+    """
+
+    def __init__(self, path: str = METADATA_STORE_PATH, mmap_size: int = METADATA_STORE_MMAP_SIZE):
+        self.path = path
+        self.mmap_size = mmap_size
+        self._db = SQLiteConnections(path, timeout=30, pragmas={"mmap_size": int(mmap_size)})
+        self._talks = {}      # talk id -> interned talk fields
+        self._talk_ids = {}   # talk fields -> talk id
+        self._talks_lock = threading.Lock()
+        self._talks_loaded = False
+        self._has_rows = False
+        conn = self._db.connection()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS talks ("
+            "id INTEGER PRIMARY KEY, speaker TEXT NOT NULL, role TEXT NOT NULL, title TEXT NOT NULL, "
+            "youtube_link TEXT NOT NULL, UNIQUE (speaker, role, title, youtube_link))"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS paragraphs ("
+            "id TEXT PRIMARY KEY, talk_id INTEGER NOT NULL REFERENCES talks (id), paragraph_deep_link TEXT NOT NULL, "
+            "paragraph_text TEXT NOT NULL, paragraph_index INTEGER NOT NULL, start_time REAL NOT NULL, end_time REAL NOT NULL)"
+        )
+        conn.commit()
+
+    def _remember_talk(self, talk_id: int, fields: tuple) -> tuple:
+        fields = tuple(sys.intern(str(value)) for value in fields)
+        self._talks[talk_id] = fields
+        self._talk_ids[fields] = talk_id
+        return fields
+
+    def _load_talks(self) -> None:
+        with self._talks_lock:
+            if self._talks_loaded:
+                return
+            rows = self._db.connection().execute(f"SELECT id, {', '.join(TALK_FIELDS)} FROM talks").fetchall()
+            for talk_id, *fields in rows:
+                self._remember_talk(talk_id, fields)
+            self._talks_loaded = True
+
+    def _talk_id(self, conn, fields: tuple) -> int:
+        talk_id = self._talk_ids.get(fields)
+        if talk_id is None:
+            conn.execute(
+                f"INSERT OR IGNORE INTO talks ({', '.join(TALK_FIELDS)}) VALUES (?, ?, ?, ?)", fields
+            )
+            talk_id = conn.execute(
+                "SELECT id FROM talks WHERE speaker = ? AND role = ? AND title = ? AND youtube_link = ?", fields
+            ).fetchone()[0]
+            with self._talks_lock:
+                self._remember_talk(talk_id, fields)
+        return talk_id
+
+    def put_many(self, records: Iterable[Tuple[str, dict]]) -> None:
+        """Store `(id, metadata)` pairs, replacing existing entries with the same id."""
+        self._load_talks()
+        conn = self._db.connection()
+        with conn:
+            rows = []
+            for paragraph_id, metadata in records:
+                talk_id = self._talk_id(conn, tuple(str(metadata.get(field) or "") for field in TALK_FIELDS))
+                rows.append((
+                    paragraph_id, talk_id,
+                    metadata.get("paragraph_deep_link") or "",
+                    metadata.get("paragraph_text") or "",
+                    int(metadata.get("paragraph_index") or 0),
+                    float(metadata.get("start_time") or 0),
+                    float(metadata.get("end_time") or 0),
+                ))
+            conn.executemany(
+                "INSERT OR REPLACE INTO paragraphs (id, talk_id, paragraph_deep_link, paragraph_text, "
+                "paragraph_index, start_time, end_time) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+        if rows:
+            self._has_rows = True
+
+    def remove_many(self, ids: Iterable[str]) -> None:
+        conn = self._db.connection()
+        with conn:
+            conn.executemany("DELETE FROM paragraphs WHERE id = ?", ((paragraph_id,) for paragraph_id in ids))
+
+    def get_many(self, ids: List[str]) -> Dict[str, dict]:
+        """Return the metadata of every stored id; unknown ids are left out."""
+        self._load_talks()
+        conn = self._db.connection()
+        found = {}
+        for i in range(0, len(ids), _LOOKUP_CHUNK):
+            chunk = ids[i:i + _LOOKUP_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            rows = conn.execute(
+                f"SELECT id, talk_id, {', '.join(PARAGRAPH_FIELDS)} FROM paragraphs WHERE id IN ({placeholders})", chunk
+            ).fetchall()
+            for paragraph_id, talk_id, *fields in rows:
+                found[paragraph_id] = self._metadata(talk_id, fields)
+        return found
+
+    def iter_all(self) -> Iterable[Tuple[str, dict]]:
+        """Yield `(id, metadata)` for every stored paragraph."""
+        self._load_talks()
+        cursor = self._db.connection().execute(f"SELECT id, talk_id, {', '.join(PARAGRAPH_FIELDS)} FROM paragraphs")
+        for paragraph_id, talk_id, *fields in cursor:
+            yield paragraph_id, self._metadata(talk_id, fields)
+
+    def _metadata(self, talk_id: int, fields: list) -> dict:
+        talk = self._talks.get(talk_id)
+        if talk is None:
+            # Written by another process since the talks were loaded
+            self._talks_loaded = False
+            self._load_talks()
+            talk = self._talks[talk_id]
+        metadata = dict(zip(TALK_FIELDS, talk))
+        metadata.update(zip(PARAGRAPH_FIELDS, fields))
+        return metadata
+
+    def has_rows(self) -> bool:
+        """Whether any paragraph is stored; an empty store cannot hydrate query results."""
+        if not self._has_rows:
+            self._has_rows = self._db.connection().execute("SELECT 1 FROM paragraphs LIMIT 1").fetchone() is not None
+        return self._has_rows
+
+    def stats(self) -> dict:
+        conn = self._db.connection()
+        return {
+            "paragraphs": conn.execute("SELECT COUNT(*) FROM paragraphs").fetchone()[0],
+            "talks": conn.execute("SELECT COUNT(*) FROM talks").fetchone()[0],
+        }
+
+
+_metadata_store = None
+_metadata_store_lock = threading.Lock()
+
+
+def get_metadata_store():
+    """Return the shared metadata store, or None when METADATA_STORE_PATH is empty."""
+    global _metadata_store
+    if not METADATA_STORE_PATH:
+        return None
+    if _metadata_store is None:
+        with _metadata_store_lock:
+            if _metadata_store is None:
+                _metadata_store = MetadataStore()
+                logger.info(f"Using paragraph metadata store at '{METADATA_STORE_PATH}'")
+    return _metadata_store
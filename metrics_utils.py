@@ -0,0 +1,126 @@
+import threading
+
+# Latency buckets in seconds, from cache hits up to the job timeout
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+# Timing keys recorded by the pipeline that are exported as stage latencies
+TIMED_STAGES = (
+    'queue_wait', 'embedding', 'vector_query', 'lexical_query', 'retrieval',
+    'llm_first_token', 'json_parse', 'verify', 'llm', 'job',
+)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{k}="{v}"' for k, v in labels) + '}'
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels):
+        return tuple((name, labels.get(name, '')) for name in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            lines.extend(self._samples())
+        return lines
+
+
+class Counter(_Metric):
+    """Monotonically increasing count, optionally split by labels."""
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _samples(self):
+        return [f"{self.name}{_format_labels(key)} {value}" for key, value in self._values.items()]
+
+
+class Gauge(_Metric):
+    """Value that is set to its current level, e.g. at scrape time."""
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def _samples(self):
+        return [f"{self.name}{_format_labels(key)} {value}" for key, value in self._values.items()]
+
+
+class Histogram(_Metric):
+    """Cumulative bucket counts, sum and count of observed values."""
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * (len(self.buckets) + 1), 0.0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            counts[-1] += 1
+            self._values[key] = (counts, total + value)
+
+    def _samples(self):
+        lines = []
+        for key, (counts, total) in self._values.items():
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                lines.append(f"{self.name}_bucket{_format_labels(key + (('le', bound),))} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {counts[-1]}")
+        return lines
+
+
+REGISTRY = []
+
+stage_latency = Histogram('quote_finder_stage_seconds', 'Time spent in each query pipeline stage.', ['stage'])
+stage_retries = Counter('quote_finder_stage_retries_total', 'Retries of each query pipeline stage.', ['stage'])
+llm_tokens = Counter('quote_finder_llm_tokens_total', 'Tokens used by LLM quote selection.', ['type'])
+jobs_finished = Counter('quote_finder_jobs_total', 'Queued jobs by final status.', ['status'])
+queries_served = Counter('quote_finder_queries_total', 'Queries answered, by mode and whether the cache served them.', ['mode', 'cached'])
+queue_depth = Gauge('quote_finder_queue_depth', 'Jobs waiting in the job queue.')
+busy_workers = Gauge('quote_finder_busy_workers', 'Jobs currently running.')
+cache_hit_ratio = Gauge('quote_finder_cache_hit_ratio', 'Hit ratio of each cache since startup.', ['cache'])
+cache_size = Gauge('quote_finder_cache_entries', 'Entries held in memory by each cache.', ['cache'])
+
+
+def observe_timings(timings):
+    """Export the stage durations, retries and LLM token counts recorded in a pipeline `timings` dict."""
+    if not timings:
+        return
+    for stage in TIMED_STAGES:
+        if stage in timings:
+            stage_latency.observe(timings[stage], stage=stage)
+    for key, value in timings.items():
+        if key.endswith('_attempts') and value > 1:
+            stage_retries.inc(value - 1, stage=key[:-len('_attempts')])
+    for kind in ('prompt_tokens', 'completion_tokens'):
+        if timings.get(kind):
+            llm_tokens.inc(timings[kind], type=kind[:-len('_tokens')])
+
+
+def render_metrics():
+    """Render every registered metric in the Prometheus text exposition format."""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
@@ -1,32 +1,69 @@
 import os
 import time
-from openai import OpenAI
+import asyncio
+import threading
 from dotenv import load_dotenv
 load_dotenv() 
 
-# Debug environment variables
-print("Environment Variables in openai_utils.py:")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-print(f"OPENAI_API_KEY exists: {bool(OPENAI_API_KEY)}")
-if OPENAI_API_KEY:
-    print(f"OPENAI_API_KEY length: {len(OPENAI_API_KEY)}")
 
-# Validate environment variables
-if not OPENAI_API_KEY:
-    raise ValueError("Missing OpenAI API key. Please set the OPENAI_API_KEY environment variable.")
+# Connection pool shared by every request made through the async client
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", 100))
 
-# Initialize the OpenAI client
-client = OpenAI(api_key=OPENAI_API_KEY)
+# Clients are created on first use so importing this module stays cheap
+_client = None
+_async_client = None
+_client_lock = threading.Lock()
 
-def get_chat_completion(system_prompt: str, user_prompt: str, model="gpt-4o", temperature=0.7, max_tokens=2000):
+def _require_api_key() -> str:
+    if not OPENAI_API_KEY:
+        raise ValueError("Missing OpenAI API key. Please set the OPENAI_API_KEY environment variable.")
+    return OPENAI_API_KEY
+
+def get_client():
+    """
+    Returns the shared OpenAI client, created on first use.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                api_key = _require_api_key()
+                from openai import OpenAI
+                _client = OpenAI(api_key=api_key)
+    return _client
+
+def get_async_client():
+    """
+    Returns the shared async OpenAI client, created on first use.
+    Its connections are bound to the event loop that first uses it (see async_utils.py).
+    """
+    global _async_client
+    if _async_client is None:
+        with _client_lock:
+            if _async_client is None:
+                api_key = _require_api_key()
+                import httpx
+                from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+                _async_client = AsyncOpenAI(
+                    api_key=api_key,
+                    http_client=DefaultAsyncHttpxClient(
+                        limits=httpx.Limits(
+                            max_connections=OPENAI_MAX_CONNECTIONS,
+                            max_keepalive_connections=OPENAI_MAX_CONNECTIONS
+                        )
+                    )
+                )
+    return _async_client
+
+def get_chat_completion(system_prompt: str, user_prompt: str, model="gpt-4o", temperature=0.7, max_tokens=2000, retries=3):
     """
     Sends a chat completion request to OpenAI.
-    Automatically retries on rate limit errors.
+    Automatically retries on rate limit errors; pass retries=1 when the caller owns the retry policy.
     """
-    retries = 3
     for attempt in range(retries):
         try:
-            completion = client.chat.completions.create(
+            completion = get_client().chat.completions.create(
                 model=model,
                 messages=[
                     {"role": "system", "content": system_prompt},
@@ -40,4 +77,68 @@ def get_chat_completion(system_prompt: str, user_prompt: str, model="gpt-4o", te
             if attempt < retries - 1 and "rate limit" in str(e).lower():
                 time.sleep(2 ** attempt)  # Exponential backoff for rate limit
             else:
-                raise e
\ No newline at end of file
+                raise e
+
+def stream_chat_completion(system_prompt: str, user_prompt: str, model="gpt-4o", temperature=0.7, max_tokens=2000, retries=3, usage: dict = None):
+    """
+    Streams a chat completion from OpenAI, yielding text deltas as they arrive.
+    Retries on rate limit errors only while opening the stream.
+    When `usage` is given it is filled with the prompt and completion token counts.
+    """
+    for attempt in range(retries):
+        try:
+            stream = get_client().chat.completions.create(
+                model=model,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt}
+                ],
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=True,
+                stream_options={"include_usage": True}
+            )
+            break
+        except Exception as e:
+            if attempt < retries - 1 and "rate limit" in str(e).lower():
+                time.sleep(2 ** attempt)  # Exponential backoff for rate limit
+            else:
+                raise e
+
+    for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+        if usage is not None and chunk.usage:
+            usage["prompt_tokens"] = chunk.usage.prompt_tokens
+            usage["completion_tokens"] = chunk.usage.completion_tokens
+
+async def async_stream_chat_completion(system_prompt: str, user_prompt: str, model="gpt-4o", temperature=0.7, max_tokens=2000, retries=3, usage: dict = None):
+    """
+    Async counterpart of `stream_chat_completion` using the pooled async client.
+    """
+    for attempt in range(retries):
+        try:
+            stream = await get_async_client().chat.completions.create(
+                model=model,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt}
+                ],
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=True,
+                stream_options={"include_usage": True}
+            )
+            break
+        except Exception as e:
+            if attempt < retries - 1 and "rate limit" in str(e).lower():
+                await asyncio.sleep(2 ** attempt)  # Exponential backoff for rate limit
+            else:
+                raise e
+
+    async for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+        if usage is not None and chunk.usage:
+            usage["prompt_tokens"] = chunk.usage.prompt_tokens
+            usage["completion_tokens"] = chunk.usage.completion_tokens
@@ -1,10 +1,16 @@
 import os
 import time
+import asyncio
+import hashlib
 import logging
+import threading
 from typing import List
-from pinecone.grpc import PineconeGRPC as Pinecone
-from pinecone import ServerlessSpec
-from openai_utils import client as openai_client 
+from openai_utils import get_client as get_openai_client, get_async_client
+from embedding_cache import get_embedding_cache
+from local_index import get_local_index
+from lexical_index import get_lexical_index
+from metadata_store import get_metadata_store
+from filter_utils import to_pinecone_filter, has_local_filters, matches_filters
 from dotenv import load_dotenv
 load_dotenv() 
 
@@ -19,65 +25,133 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
-# Debug environment variables
-print("Environment Variables in pinecones_utils_openai.py:")
 PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
-print(f"PINECONE_API_KEY exists: {bool(PINECONE_API_KEY)}")
-if PINECONE_API_KEY:
-    print(f"PINECONE_API_KEY length: {len(PINECONE_API_KEY)}")
 
-# Validate environment variables
-if not PINECONE_API_KEY:
-    raise ValueError("Missing Pinecone API key. Please set the PINECONE_API_KEY environment variable.")
+# Retrieval backend: "pinecone" or "local" (in-process snapshot, see local_index.py)
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "pinecone")
 
-# Create the Pinecone client
-pinecone_client = Pinecone(api_key=PINECONE_API_KEY)
+# Seconds to wait for a new or restarting index to report ready
+INDEX_READY_TIMEOUT = float(os.getenv("PINECONE_INDEX_READY_TIMEOUT", 120))
 
 # Constants
 INDEX_NAME = "general-conf-embed3"  # Index for 3072-dim embeddings
 NAMESPACE = "gc-2018-2024"
 DIMENSION = 3072
+EMBEDDING_MODEL = "text-embedding-3-large"
 BATCH_SIZE = 100
+UPSERT_BATCH_SIZE = 50  # Keeps each upsert request well under Pinecone's 2MB limit
 
-# Global Pinecone index to avoid reinitialization
+# Hybrid retrieval
+HYBRID_SEARCH = os.getenv("HYBRID_SEARCH", "1") == "1"
+RRF_K = 60  # Reciprocal rank fusion constant
+LOCAL_FILTER_OVERFETCH = 5  # Extra candidates fetched when some filters can only be applied locally
+
+# Pinecone client and index, created on first use (see get_pinecone_client and setup_openai_pinecone_index)
+pinecone_client = None
 pinecone_index = None
+_pinecone_lock = threading.Lock()
 
 def validate_embedding_dimension(embedding: List[float]) -> None:
     """Validates that an embedding has the correct dimension."""
     if len(embedding) != DIMENSION:
         raise ValueError(f"Expected dimension {DIMENSION}, got {len(embedding)}")
 
+def get_pinecone_client():
+    """Returns the shared Pinecone gRPC client, importing and creating it on first use."""
+    global pinecone_client
+    if pinecone_client is None:
+        with _pinecone_lock:
+            if pinecone_client is None:
+                if not PINECONE_API_KEY:
+                    raise ValueError("Missing Pinecone API key. Please set the PINECONE_API_KEY environment variable.")
+                from pinecone.grpc import PineconeGRPC
+                pinecone_client = PineconeGRPC(api_key=PINECONE_API_KEY)
+    return pinecone_client
+
 def setup_openai_pinecone_index():
-    """Creates or checks the Pinecone index and initializes it globally."""
+    """
+    Creates or checks the Pinecone index and initializes it globally.
+    Concurrent first callers wait on one setup instead of each creating and polling the index.
+    """
     global pinecone_index
-    if pinecone_index:
+    if pinecone_index is not None:
         return pinecone_index
 
-    logger.info(f"Checking for index: {INDEX_NAME}")
-    if not pinecone_client.has_index(INDEX_NAME):
-        logger.info(f"Creating new index: {INDEX_NAME}")
-        pinecone_client.create_index(
-            name=INDEX_NAME,
-            dimension=DIMENSION,
-            metric="cosine",
-            spec=ServerlessSpec(
-                cloud='aws',
-                region='us-east-1'
+    from pinecone import ServerlessSpec
+    from pinecone.exceptions import NotFoundException
+
+    client = get_pinecone_client()
+    with _pinecone_lock:
+        if pinecone_index is not None:
+            return pinecone_index
+
+        logger.info(f"Checking for index: {INDEX_NAME}")
+        try:
+            description = client.describe_index(INDEX_NAME)
+        except NotFoundException:
+            description = None
+        if description is None:
+            logger.info(f"Creating new index: {INDEX_NAME}")
+            client.create_index(
+                name=INDEX_NAME,
+                dimension=DIMENSION,
+                metric="cosine",
+                spec=ServerlessSpec(
+                    cloud='aws',
+                    region='us-east-1'
+                )
             )
-        )
-        logger.info(f"Created Pinecone index: {INDEX_NAME}")
+            logger.info(f"Created Pinecone index: {INDEX_NAME}")
+            description = client.describe_index(INDEX_NAME)
 
-    logger.info("Waiting for index to be ready...")
-    while not pinecone_client.describe_index(INDEX_NAME).status['ready']:
-        time.sleep(1)
+        # Poll with backoff only while the index is not ready yet
+        deadline = time.monotonic() + INDEX_READY_TIMEOUT
+        delay = 0.5
+        while not description.status['ready']:
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"Pinecone index '{INDEX_NAME}' was not ready after {INDEX_READY_TIMEOUT:g}s")
+            logger.info("Waiting for index to be ready...")
+            time.sleep(delay)
+            delay = min(delay * 2, 5.0)
+            description = client.describe_index(INDEX_NAME)
 
-    pinecone_index = pinecone_client.Index(INDEX_NAME)
-    logger.info(f"Pinecone index '{INDEX_NAME}' is ready.")
+        pinecone_index = client.Index(INDEX_NAME)
+        logger.info(f"Pinecone index '{INDEX_NAME}' is ready.")
     return pinecone_index
 
-def embed_texts_with_openai(texts: List[str], model: str = "text-embedding-3-large", batch_size: int = BATCH_SIZE) -> List[List[float]]:
+def get_vector_index():
+    """Returns the configured retrieval backend: the Pinecone index or the local index."""
+    if VECTOR_BACKEND == "local":
+        return get_local_index()
+    if VECTOR_BACKEND != "pinecone":
+        raise ValueError(f"Unknown VECTOR_BACKEND: {VECTOR_BACKEND}")
+    return setup_openai_pinecone_index()
+
+def embed_texts_with_openai(texts: List[str], model: str = EMBEDDING_MODEL, batch_size: int = BATCH_SIZE, use_cache: bool = True) -> List[List[float]]:
     """
     Creates embeddings using OpenAI's API and returns a list of embeddings.
+    Texts already in the embedding cache are not sent to the API again.
+    """
+    if not use_cache:
+        return _request_openai_embeddings(texts, model, batch_size)
+
+    cache = get_embedding_cache()
+    embeddings = cache.get_many(texts, model)
+
+    # Embed each distinct uncached text once
+    missing = list(dict.fromkeys(text for text, emb in zip(texts, embeddings) if emb is None))
+    logger.info(f"Embedding cache: {len(texts) - sum(emb is None for emb in embeddings)} hits, {len(missing)} texts to embed")
+    if missing:
+        new_embeddings = _request_openai_embeddings(missing, model, batch_size)
+        cache.put_many(missing, new_embeddings, model)
+        lookup = dict(zip(missing, new_embeddings))
+        embeddings = [emb if emb is not None else lookup[text] for text, emb in zip(texts, embeddings)]
+
+    return embeddings
+
+def _request_openai_embeddings(texts: List[str], model: str, batch_size: int) -> List[List[float]]:
+    """
+    Calls the OpenAI embeddings API in batches, bypassing the cache.
     """
     all_embeddings = []
     total_batches = (len(texts) - 1) // batch_size + 1
@@ -90,7 +164,7 @@ def embed_texts_with_openai(texts: List[str], model: str = "text-embedding-3-lar
         logger.info(f"Processing batch {batch_num}/{total_batches}, size {len(batch)}")
         
         try:
-            response = openai_client.embeddings.create(
+            response = get_openai_client().embeddings.create(
                 model=model,
                 input=batch
             )
@@ -115,48 +189,272 @@ def embed_texts_with_openai(texts: List[str], model: str = "text-embedding-3-lar
     logger.info(f"Completed embedding all {len(texts)} texts")
     return all_embeddings
 
-def query_openai_paragraphs(query: str, top_k=10) -> List[dict]:
+def _vector_query_args(query_embedding: List[float], top_k: int, filters: dict) -> dict:
     """
-    Query the index using OpenAI embeddings.
-    Returns a list of matching paragraph metadata.
+    Keyword arguments for `index.query`, over-fetching when some filters can only be applied locally.
+    Only ids and scores are requested when the local metadata store can hydrate the matches.
     """
-    index = setup_openai_pinecone_index()  # Use global index
-    logger.info("Pinecone index ready for querying.")
-
-    # Embed the query using OpenAI
-    logger.info(f"Embedding query: '{query}'")
-    query_embedding = embed_texts_with_openai([query])[0]  # Get first (and only) embedding
-    logger.info("Query embedding completed.")
-
-    # Query Pinecone
-    logger.info(f"Querying Pinecone for top {top_k} matches...")
-    response = index.query(
-        vector=query_embedding,
-        top_k=top_k,
-        namespace=NAMESPACE,
-        include_metadata=True
-    )
+    store = get_metadata_store()
+    return {
+        "vector": query_embedding,
+        "top_k": top_k * LOCAL_FILTER_OVERFETCH if has_local_filters(filters) else top_k,
+        "namespace": NAMESPACE,
+        "include_metadata": store is None or not store.has_rows(),
+        "filter": to_pinecone_filter(filters)
+    }
 
-    matches = response.matches
-    logger.info(f"Retrieved {len(matches)} matches from Pinecone.")
+def _hydrate_matches(index, matches, query_args: dict) -> dict:
+    """
+    Look up the metadata of matches returned without it, as `{id: metadata}`.
+    Ids the store does not have yet (written before it existed) are fetched from the index
+    and added to it, so each is fetched only once.
+    """
+    if query_args["include_metadata"]:
+        return {}
+    ids = list(dict.fromkeys(match.id for match in matches))
+    store = get_metadata_store()
+    metadata = store.get_many(ids)
+    missing = [paragraph_id for paragraph_id in ids if paragraph_id not in metadata]
+    if missing:
+        response = index.fetch(ids=missing, namespace=NAMESPACE)
+        fetched = {vector_id: dict(vector.metadata or {}) for vector_id, vector in response.vectors.items()}
+        store.put_many(fetched.items())
+        metadata.update(fetched)
+        logger.info(f"Added {len(fetched)} of {len(missing)} matches missing from the metadata store")
+    return metadata
 
-    # Format the results
+def _format_matches(matches, top_k: int, filters: dict, metadata: dict = None) -> List[dict]:
+    """
+    Apply local filters to index matches and format them as paragraph dicts.
+    Metadata is taken from `metadata` (hydrated from the metadata store) when given, else from the matches.
+    """
+    metadata = metadata or {}
+    paragraphs = [(match, metadata.get(match.id) or match.metadata) for match in matches]
+    # A match deleted between the query and the metadata lookup has neither
+    paragraphs = [(match, meta) for match, meta in paragraphs if meta is not None]
+    if has_local_filters(filters):
+        paragraphs = [(match, meta) for match, meta in paragraphs if matches_filters(meta, filters)][:top_k]
     return [
         {
             "id": match.id,
             "score": match.score,
-            "paragraph_text": match.metadata.get("paragraph_text", ""),
-            "metadata": match.metadata
+            "paragraph_text": meta.get("paragraph_text", ""),
+            "metadata": meta
         }
-        for match in matches
+        for match, meta in paragraphs
     ]
 
+def query_openai_paragraphs(query: str, top_k=10, timings: dict = None, filters: dict = None, query_embedding: List[float] = None) -> List[dict]:
+    """
+    Query the index using OpenAI embeddings.
+    Returns a list of matching paragraph metadata.
+    Speaker and title filters are pushed down to the index; year filters are applied locally.
+    Pass `query_embedding` when the query has already been embedded.
+    Embedding and vector query durations are recorded in `timings` when given.
+    """
+    filters = filters or {}
+    index = get_vector_index()  # Use global index
+    logger.info(f"Vector index ready for querying ({VECTOR_BACKEND} backend).")
+
+    started = time.monotonic()
+    if query_embedding is None:
+        # Embed the query using OpenAI
+        logger.info(f"Embedding query: '{query}'")
+        query_embedding = embed_texts_with_openai([query])[0]  # Get first (and only) embedding
+        logger.info("Query embedding completed.")
+        if timings is not None:
+            timings["embedding"] = round(time.monotonic() - started, 4)
+    embedded = time.monotonic()
+
+    # Query the vector index
+    query_args = _vector_query_args(query_embedding, top_k, filters)
+    logger.info(f"Querying {VECTOR_BACKEND} index for top {query_args['top_k']} matches...")
+    response = index.query(**query_args)
+    metadata = _hydrate_matches(index, response.matches, query_args)
+
+    results = _format_matches(response.matches, top_k, filters, metadata)
+    if timings is not None:
+        timings["vector_query"] = round(time.monotonic() - embedded, 4)
+    logger.info(f"Retrieved {len(results)} matches from {VECTOR_BACKEND} index.")
+    return results
+
+def fuse_hybrid_results(vector_results: List[dict], lexical_results: list, top_k: int) -> List[dict]:
+    """
+    Fuse vector results and lexical `(id, score)` pairs with reciprocal rank fusion.
+    The fused score replaces `score`; the original vector score is kept as `vector_score`.
+    """
+    fused = {}
+    for rank, result in enumerate(vector_results):
+        fused[result["id"]] = dict(result, vector_score=result["score"], score=1.0 / (RRF_K + rank + 1))
+    lexical_only = [doc_id for doc_id, _ in lexical_results if doc_id not in fused]
+    lexical_metadata = get_lexical_index().get_metadata_many(lexical_only) if lexical_only else {}
+    for rank, (doc_id, _) in enumerate(lexical_results):
+        if doc_id in fused:
+            fused[doc_id]["score"] += 1.0 / (RRF_K + rank + 1)
+        elif doc_id in lexical_metadata:
+            metadata = lexical_metadata[doc_id]
+            fused[doc_id] = {
+                "id": doc_id,
+                "score": 1.0 / (RRF_K + rank + 1),
+                "vector_score": None,
+                "paragraph_text": metadata.get("paragraph_text", ""),
+                "metadata": metadata
+            }
+    return sorted(fused.values(), key=lambda r: r["score"], reverse=True)[:top_k]
+
+def hybrid_query_paragraphs(query: str, top_k=10, timings: dict = None, filters: dict = None, query_embedding: List[float] = None) -> List[dict]:
+    """
+    Fuse vector and BM25 results with reciprocal rank fusion.
+    Falls back to vector search alone when the lexical index is empty or hybrid search is disabled.
+    """
+    lexical_index = get_lexical_index()
+    vector_results = query_openai_paragraphs(query, top_k=top_k, timings=timings, filters=filters, query_embedding=query_embedding)
+    if not HYBRID_SEARCH or not len(lexical_index):
+        return vector_results
+
+    started = time.monotonic()
+    lexical_results = lexical_index.search(query, top_k=top_k, filters=filters)
+    results = fuse_hybrid_results(vector_results, lexical_results, top_k)
+    if timings is not None:
+        timings["lexical_query"] = round(time.monotonic() - started, 4)
+    logger.info(f"Hybrid search fused {len(vector_results)} vector and {len(lexical_results)} lexical matches.")
+    return results
+
+async def async_embed_texts_with_openai(texts: List[str], model: str = EMBEDDING_MODEL, batch_size: int = BATCH_SIZE) -> List[List[float]]:
+    """
+    Async counterpart of `embed_texts_with_openai`, using the pooled async OpenAI client.
+    Cache reads and writes go to SQLite, so they run in the default executor rather than on the event loop.
+    """
+    cache = await asyncio.to_thread(get_embedding_cache)
+    embeddings = await asyncio.to_thread(cache.get_many, texts, model)
+    missing = list(dict.fromkeys(text for text, emb in zip(texts, embeddings) if emb is None))
+    if not missing:
+        return embeddings
+
+    client = get_async_client()
+    new_embeddings = []
+    for i in range(0, len(missing), batch_size):
+        response = await client.embeddings.create(model=model, input=missing[i:i + batch_size])
+        new_embeddings.extend(item.embedding for item in response.data)
+    for emb in new_embeddings:
+        validate_embedding_dimension(emb)
+    await asyncio.to_thread(cache.put_many, missing, new_embeddings, model)
+    lookup = dict(zip(missing, new_embeddings))
+    return [emb if emb is not None else lookup[text] for text, emb in zip(texts, embeddings)]
+
+async def _async_vector_query(index, query_args: dict):
+    """
+    Query the vector index without holding a thread for the duration of the request.
+    Pinecone gRPC queries return a future that is awaited directly; the in-process
+    local index runs in the default executor.
+    """
+    if VECTOR_BACKEND == "pinecone":
+        from google.protobuf import json_format
+        from pinecone.grpc.utils import parse_query_response
+
+        # The future resolves to the raw protobuf response; parse it the way the sync `query` does
+        response = await asyncio.wrap_future(index.query(**query_args, async_req=True))
+        return parse_query_response(json_format.MessageToDict(response), _check_type=False)
+    return await asyncio.to_thread(index.query, **query_args)
+
+async def async_query_openai_paragraphs(query: str, top_k=10, timings: dict = None, filters: dict = None, query_embedding: List[float] = None) -> List[dict]:
+    """
+    Async counterpart of `query_openai_paragraphs`.
+    """
+    filters = filters or {}
+    # First use may wait for the index to become ready, or for warm-up holding its lock
+    index = await asyncio.to_thread(get_vector_index)
+    if query_embedding is None:
+        started = time.monotonic()
+        query_embedding = (await async_embed_texts_with_openai([query]))[0]
+        if timings is not None:
+            timings["embedding"] = round(time.monotonic() - started, 4)
+    embedded = time.monotonic()
+
+    # The metadata store is SQLite; keep its lookups off the event loop
+    query_args = await asyncio.to_thread(_vector_query_args, query_embedding, top_k, filters)
+    response = await _async_vector_query(index, query_args)
+    metadata = await asyncio.to_thread(_hydrate_matches, index, response.matches, query_args)
+    results = _format_matches(response.matches, top_k, filters, metadata)
+    if timings is not None:
+        timings["vector_query"] = round(time.monotonic() - embedded, 4)
+    return results
+
+async def async_hybrid_query_paragraphs(query: str, top_k=10, timings: dict = None, filters: dict = None, query_embedding: List[float] = None) -> List[dict]:
+    """
+    Async counterpart of `hybrid_query_paragraphs`; the lexical search runs while the vector query is in flight.
+    """
+    # First use builds the index from the metadata store
+    lexical_index = await asyncio.to_thread(get_lexical_index)
+    if not HYBRID_SEARCH or not len(lexical_index):
+        return await async_query_openai_paragraphs(query, top_k=top_k, timings=timings, filters=filters, query_embedding=query_embedding)
+
+    async def lexical_search():
+        started = time.monotonic()
+        results = await asyncio.to_thread(lexical_index.search, query, top_k, filters)
+        if timings is not None:
+            timings["lexical_query"] = round(time.monotonic() - started, 4)
+        return results
+
+    vector_results, lexical_results = await asyncio.gather(
+        async_query_openai_paragraphs(query, top_k=top_k, timings=timings, filters=filters, query_embedding=query_embedding),
+        lexical_search()
+    )
+    # Lexical-only hits are hydrated from the metadata store, so fuse off the event loop
+    return await asyncio.to_thread(fuse_hybrid_results, vector_results, lexical_results, top_k)
+
+def paragraph_metadata(p: dict) -> dict:
+    """
+    Build the metadata stored with each paragraph vector.
+    """
+    return {
+        "speaker": p.get("speaker", ""),
+        "role": p.get("role", ""),
+        "title": p.get("title", ""),
+        "youtube_link": p.get("youtube_link", ""),
+        "paragraph_deep_link": p.get("paragraph_deep_link", ""),
+        "paragraph_text": p.get("paragraph_text", ""),
+        "paragraph_index": p.get("paragraph_index", 0),
+        "start_time": p.get("start_time", 0),
+        "end_time": p.get("end_time", 0)
+    }
+
+def stable_paragraph_id(p: dict) -> str:
+    """
+    Content-derived id that does not depend on the order paragraphs are ingested in.
+    Based on where the paragraph lives (deep link, or talk and paragraph index) so an edited
+    paragraph keeps its id; falls back to the text itself when no location pins the paragraph
+    down, since a talk alone would give all its paragraphs the same id.
+    """
+    if p.get("paragraph_deep_link"):
+        key = f"{p['paragraph_deep_link']}|{p.get('paragraph_index', 0)}"
+    elif p.get("title") and p.get("paragraph_index") is not None:
+        key = f"{p.get('speaker', '')}|{p['title']}|{p['paragraph_index']}"
+    else:
+        key = p.get("paragraph_text", "")
+    return "gc-" + hashlib.sha256(key.encode("utf-8")).hexdigest()[:24]
+
+def upsert_records(index, records: list, batch_size: int = UPSERT_BATCH_SIZE) -> None:
+    """
+    Upsert `(id, values, metadata)` records in bounded chunks.
+    """
+    for i in range(0, len(records), batch_size):
+        index.upsert(vectors=records[i:i + batch_size], namespace=NAMESPACE)
+
+def flush_vector_index(index) -> None:
+    """
+    Persist buffered writes for backends that buffer them (the local index); Pinecone writes are immediate.
+    """
+    if hasattr(index, "flush"):
+        index.flush()
+
 def upsert_openai_embeddings(paragraphs: List[dict]) -> None:
     """
-    Create OpenAI embeddings for paragraphs and upsert to Pinecone.
+    Create OpenAI embeddings for paragraphs and upsert to the vector index.
     Each paragraph should be a dict with at least 'paragraph_text' and other metadata.
+    For large corpora use ingest.py, which streams, parallelizes and checkpoints the work.
     """
-    index = setup_openai_pinecone_index()
+    index = get_vector_index()
     
     # Extract texts for embedding
     texts = [p["paragraph_text"] for p in paragraphs]
@@ -167,30 +465,94 @@ def upsert_openai_embeddings(paragraphs: List[dict]) -> None:
     
     # Prepare records for upserting
     records = []
-    for i, (p, embedding) in enumerate(zip(paragraphs, embeddings)):
-        paragraph_id = p.get("id", f"p{i}")
-        metadata = {
-            "speaker": p.get("speaker", ""),
-            "role": p.get("role", ""),
-            "title": p.get("title", ""),
-            "youtube_link": p.get("youtube_link", ""),
-            "paragraph_deep_link": p.get("paragraph_deep_link", ""),
-            "paragraph_text": p.get("paragraph_text", ""),
-            "paragraph_index": p.get("paragraph_index", 0),
-            "start_time": p.get("start_time", 0),
-            "end_time": p.get("end_time", 0)
-        }
-        records.append((paragraph_id, embedding, metadata))
+    for p, embedding in zip(paragraphs, embeddings):
+        paragraph_id = p.get("id") or stable_paragraph_id(p)
+        records.append((paragraph_id, embedding, paragraph_metadata(p)))
 
-    # Upsert to Pinecone
-    logger.info(f"Upserting {len(records)} records to Pinecone...")
+    # Upsert to the vector index
+    logger.info(f"Upserting {len(records)} records to {VECTOR_BACKEND} index...")
     try:
-        index.upsert(vectors=records, namespace=NAMESPACE)
+        upsert_records(index, records)
+        flush_vector_index(index)
         logger.info("Upsert completed successfully")
     except Exception as e:
         logger.error(f"Error during upsert: {e}")
         raise
 
+    # Keep the metadata store and lexical index in step with the vector index; the store is
+    # written first since the lexical index reads its metadata from it
+    store_metadata(records)
+    lexical_index = get_lexical_index()
+    lexical_index.add_many((paragraph_id, metadata) for paragraph_id, _, metadata in records)
+    lexical_index.save()
+
+def store_metadata(records: list) -> None:
+    """
+    Add `(id, values, metadata)` records to the metadata store, if one is configured.
+    """
+    store = get_metadata_store()
+    if store is not None:
+        store.put_many((record_id, metadata) for record_id, _, metadata in records)
+
+def iter_pinecone_records(fetch_batch_size: int = 100):
+    """
+    Yield every `(id, values, metadata)` record stored in the Pinecone namespace.
+    """
+    index = setup_openai_pinecone_index()
+    fetched = 0
+    for ids in index.list(namespace=NAMESPACE):
+        for i in range(0, len(ids), fetch_batch_size):
+            response = index.fetch(ids=ids[i:i + fetch_batch_size], namespace=NAMESPACE)
+            for vector_id, vector in response.vectors.items():
+                yield vector_id, list(vector.values), dict(vector.metadata or {})
+                fetched += 1
+        logger.info(f"Fetched {fetched} vectors from Pinecone")
+
+def export_local_snapshot(path: str = None) -> None:
+    """
+    Copy every vector and its metadata from the Pinecone namespace into a local index snapshot.
+    """
+    from local_index import LocalVectorIndex, LOCAL_INDEX_PATH
+
+    local = LocalVectorIndex(path=path or LOCAL_INDEX_PATH, mode="exact")
+    batch = []
+    for record in iter_pinecone_records():
+        batch.append(record)
+        if len(batch) >= UPSERT_BATCH_SIZE:
+            local.upsert(vectors=batch)
+            batch = []
+    local.upsert(vectors=batch)
+    local.save()
+
+def rebuild_metadata_store() -> None:
+    """
+    Rebuild the local metadata store from the metadata stored in the Pinecone namespace.
+    """
+    batch = []
+    for record in iter_pinecone_records():
+        batch.append(record)
+        if len(batch) >= UPSERT_BATCH_SIZE:
+            store_metadata(batch)
+            batch = []
+    store_metadata(batch)
+
+def rebuild_lexical_index() -> None:
+    """
+    Rebuild the local lexical index from the metadata stored in the Pinecone namespace.
+    The metadata store is refreshed along the way, since the lexical index reads its metadata from it.
+    """
+    lexical_index = get_lexical_index()
+    batch = []
+    for record in iter_pinecone_records():
+        batch.append(record)
+        if len(batch) >= UPSERT_BATCH_SIZE:
+            store_metadata(batch)
+            lexical_index.add_many((vector_id, metadata) for vector_id, _, metadata in batch)
+            batch = []
+    store_metadata(batch)
+    lexical_index.add_many((vector_id, metadata) for vector_id, _, metadata in batch)
+    lexical_index.save()
+
 if __name__ == "__main__":
     # Example usage
     sample_query = "How can I find peace in life?"
@@ -0,0 +1,92 @@
+import os
+import logging
+import threading
+from verify_utils import QuoteVerifier, normalize_text, normalize_paragraph
+
+logger = logging.getLogger(__name__)
+
+# Prompt configuration
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", 3000))  # Tokens of paragraph text per prompt
+PROMPT_TOKENIZER_MODEL = os.getenv("PROMPT_TOKENIZER_MODEL", "gpt-4o")
+CHARS_PER_TOKEN = 4  # Estimate used when tiktoken or its encoding file is unavailable
+
+_encoding = None
+_encoding_loaded = False
+_encoding_lock = threading.Lock()
+
+
+def get_encoding():
+    """Return the tiktoken encoding of the chat model, or None if it cannot be loaded."""
+    global _encoding, _encoding_loaded
+    if _encoding_loaded:
+        return _encoding
+    with _encoding_lock:
+        if not _encoding_loaded:
+            try:
+                import tiktoken
+                _encoding = tiktoken.encoding_for_model(PROMPT_TOKENIZER_MODEL)
+            except Exception as e:
+                # tiktoken downloads its encoding files on first use, which fails offline
+                logger.warning(f"Tokenizer unavailable, estimating {CHARS_PER_TOKEN} characters per token: {e}")
+            _encoding_loaded = True
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    encoding = get_encoding()
+    if encoding is None:
+        return -(-len(text) // CHARS_PER_TOKEN)
+    return len(encoding.encode(text))
+
+
+def contains_span(paragraph, span: str) -> bool:
+    """Whether `span` occurs in the paragraph text, ignoring case, punctuation and spacing."""
+    normalized = normalize_text(span)
+    text = paragraph['metadata']['paragraph_text']
+    return bool(normalized) and normalized in normalize_paragraph(paragraph.get('id') or text, text).text
+
+
+class PromptContext:
+    """
+    Retrieved paragraphs packed into one LLM prompt under a token budget.
+    Each paragraph is sent as its text alone behind a short local id (P1, P2, ...);
+    the model answers with ids and the metadata is looked up here instead of echoed back.
+    Paragraphs are packed in retrieval order and skipped once they no longer fit,
+    but the first one is always sent.
+    """
+
+    def __init__(self, user_message, paragraphs, budget=PROMPT_TOKEN_BUDGET):
+        self.paragraphs = {}
+        blocks = []
+        self.context_tokens = 0
+        for p in paragraphs:
+            local_id = f"P{len(blocks) + 1}"
+            block = f"[{local_id}] {p['paragraph_text']}"
+            tokens = count_tokens(block)
+            if blocks and self.context_tokens + tokens > budget:
+                continue
+            self.paragraphs[local_id] = p
+            blocks.append(block)
+            self.context_tokens += tokens
+        self.dropped = len(paragraphs) - len(blocks)
+        if self.dropped:
+            logger.info(f"Prompt token budget of {budget} left out {self.dropped} of {len(paragraphs)} paragraphs")
+        self.prompt = (
+            "Paragraphs:\n\n" + "\n\n".join(blocks) +
+            f"\n\nUser question: {user_message}\n\n"
+            'Return ONLY a raw JSON array such as [{"id": "P3"}, {"id": "P1", "quote": "exact sentence"}] - no markdown or code blocks.'
+        )
+        self._verifier = None
+
+    def lookup(self, local_id):
+        """Return the paragraph sent under `local_id`, or None."""
+        if not isinstance(local_id, str):
+            return None
+        return self.paragraphs.get(local_id.strip().strip('[]').upper())
+
+    @property
+    def verifier(self):
+        """Quote verifier over the packed paragraphs, built the first time a quote needs matching."""
+        if self._verifier is None:
+            self._verifier = QuoteVerifier(list(self.paragraphs.values()))
+        return self._verifier
@@ -12,20 +12,11 @@ CRITICAL INSTRUCTIONS:
    - Personal experiences
    - Promises and blessings
    - Modern day counsel
-3. Use EXACT quotes from the provided paragraphs - no modifications
-4. Include ALL metadata fields exactly as provided
-5. NEVER create or combine quotes
+3. Each paragraph is labelled with an id such as [P1]; refer to paragraphs ONLY by these ids
+4. Optionally add "quote": the single most relevant sentence (at most 25 words), copied EXACTLY from that paragraph
+5. NEVER create, modify or combine quotes, and never return ids that were not provided
 6. Order quotes by relevance to the user's question
 
-Format each quote exactly as:
-[{
-    "speaker": "exact name",
-    "role": "exact role",
-    "title": "exact title",
-    "youtube_link": "exact link",
-    "paragraph_deep_link": "exact link",
-    "paragraph_text": "exact quote",
-    "start_time": number,
-    "end_time": number
-}]
+Format the answer exactly as:
+[{"id": "P3", "quote": "exact sentence"}, {"id": "P1"}]
 """
\ No newline at end of file
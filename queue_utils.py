@@ -1,28 +1,270 @@
-from queue import Queue
+import os
+import asyncio
 import threading
+import time
+from queue import Queue, Full
+from job_store import create_job_store
+from metrics_utils import observe_timings, jobs_finished
 
-# Global job queue and results storage
-job_queue = Queue()
-job_results = {}
+# Worker pool configuration
+NUM_WORKERS = int(os.getenv('QUEUE_NUM_WORKERS', 4))
+MAX_QUEUE_SIZE = int(os.getenv('QUEUE_MAX_SIZE', 100))
+JOB_TIMEOUT = float(os.getenv('QUEUE_JOB_TIMEOUT', 120))
+ASYNC_MAX_IN_FLIGHT = int(os.getenv('QUEUE_ASYNC_MAX_IN_FLIGHT', 200))
 
-def process_jobs(process_query):
+# Global job queue and results storage (see job_store.py for the backends)
+job_queue = Queue(maxsize=MAX_QUEUE_SIZE)
+job_results = create_job_store()
+
+# Progress of the jobs running in this process, by job id, for clients that stream it (see JobEvents)
+job_events = {}
+
+# Worker pool metrics
+_metrics_lock = threading.Lock()
+_metrics = {
+    'workers': 0,
+    'busy_workers': 0,
+    'submitted': 0,
+    'rejected': 0,
+    'completed': 0,
+    'failed': 0,
+    'timed_out': 0,
+}
+_busy_seconds = 0.0
+_started_at = None
+
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted while the job queue is at capacity."""
+
+
+class JobTimeoutError(Exception):
+    """Raised when a job runs longer than the configured timeout."""
+
+
+class JobEvents:
+    """
+    Events published by a running job, as `(event, data)` pairs.
+    Every subscriber receives all events from the first one, so clients that join
+    an in-flight job late still see its earlier results.
+    """
+
+    def __init__(self):
+        self._events = []
+        self._condition = threading.Condition()
+        self.closed = False
+
+    def publish(self, event, data):
+        """Append an event; events published after `close` are dropped."""
+        with self._condition:
+            if not self.closed:
+                self._events.append((event, data))
+                self._condition.notify_all()
+
+    def close(self):
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
+
+    def subscribe(self, idle_timeout):
+        """Yield the events until the job closes them, and `(None, None)` after every `idle_timeout` seconds without one."""
+        position = 0
+        while True:
+            with self._condition:
+                if position >= len(self._events) and not self.closed:
+                    self._condition.wait(idle_timeout)
+                events = self._events[position:]
+                closed = self.closed
+            position += len(events)
+            if events:
+                yield from events
+            elif closed:
+                return
+            else:
+                yield None, None
+
+
+def _increment(name, amount=1):
+    with _metrics_lock:
+        _metrics[name] += amount
+
+
+def submit_job(job_id, user_message, **options):
+    """
+    Queue a job without blocking; `options` are passed on to `process_query`.
+    Raises QueueFullError when the queue is at capacity so callers can shed load.
+    """
+    job_results.set(job_id, {'status': 'pending'})
+    try:
+        job_queue.put_nowait((job_id, user_message, options, time.monotonic()))
+    except Full:
+        job_results.delete(job_id)
+        _increment('rejected')
+        raise QueueFullError(f"Job queue is full ({job_queue.maxsize} pending jobs)")
+    _increment('submitted')
+
+
+def run_with_timeout(func, args, timeout, kwargs=None):
+    """
+    Run `func(*args, **kwargs)` in a helper thread and wait at most `timeout` seconds.
+    A timed-out call keeps running in the background, but its result is discarded.
+    """
+    outcome = {}
+
+    def target():
+        try:
+            outcome['result'] = func(*args, **(kwargs or {}))
+        except Exception as e:
+            outcome['error'] = e
+
+    runner = threading.Thread(target=target, daemon=True)
+    runner.start()
+    runner.join(timeout)
+    if runner.is_alive():
+        raise JobTimeoutError(f"Job exceeded timeout of {timeout:g}s")
+    if 'error' in outcome:
+        raise outcome['error']
+    return outcome.get('result')
+
+
+def _start_job(enqueued_at):
+    """Mark a worker slot busy and start the job's timings with its time spent queued."""
+    _increment('busy_workers')
+    started = time.monotonic()
+    return started, {'queue_wait': round(started - enqueued_at, 4)}
+
+
+def _finish_job(job_id, user_message, options, outcome, started, timings, on_complete):
+    """Store the job's outcome and timings, export its metrics, run the completion callback and mark it done."""
+    global _busy_seconds
+    timings['job'] = round(time.monotonic() - started, 4)
+    outcome['timings'] = timings
+    job_results.set(job_id, outcome)
+    observe_timings(timings)
+    jobs_finished.inc(status='timed_out' if outcome.get('timed_out') else outcome['status'])
+    with _metrics_lock:
+        _metrics['busy_workers'] -= 1
+        _busy_seconds += time.monotonic() - started
+    if on_complete:
+        try:
+            on_complete(job_id, user_message, outcome, **options)
+        except Exception as e:
+            print(f"[ERROR] Completion callback failed for job {job_id}: {e}")
+    job_queue.task_done()
+
+
+def process_jobs(process_query, on_complete=None):
     """
     Background worker to process jobs.
     Dynamically receives the `process_query` function to avoid circular imports.
+    `on_complete(job_id, user_message, outcome, **options)` is called once the job has a final status.
     """
     while True:
-        job_id, user_message = job_queue.get()
+        job_id, user_message, options, enqueued_at = job_queue.get()
+        started, timings = _start_job(enqueued_at)
+        outcome = {'status': 'error', 'error': 'Job was interrupted'}
         try:
-            result = process_query(user_message)
-            job_results[job_id] = {'status': 'complete', 'data': result}
+            result = run_with_timeout(process_query, (user_message,), JOB_TIMEOUT, dict(options, timings=timings))
+            outcome = {'status': 'complete', 'data': result}
+            _increment('completed')
+        except JobTimeoutError as e:
+            outcome = {'status': 'error', 'error': str(e), 'timed_out': True}
+            _increment('timed_out')
         except Exception as e:
-            job_results[job_id] = {'status': 'error', 'error': str(e)}
+            outcome = {'status': 'error', 'error': str(e)}
+            _increment('failed')
         finally:
-            job_queue.task_done()
+            _finish_job(job_id, user_message, options, outcome, started, timings, on_complete)
+
+
+async def _run_async_job(process_query_async, job_id, user_message, options, enqueued_at, on_complete):
+    """Run one job on the event loop; a timed-out job is cancelled rather than left running."""
+    started, timings = _start_job(enqueued_at)
+    outcome = {'status': 'error', 'error': 'Job was cancelled'}
+    try:
+        result = await asyncio.wait_for(process_query_async(user_message, timings=timings, **options), JOB_TIMEOUT)
+        outcome = {'status': 'complete', 'data': result}
+        _increment('completed')
+    except asyncio.TimeoutError:
+        outcome = {'status': 'error', 'error': f"Job exceeded timeout of {JOB_TIMEOUT:g}s", 'timed_out': True}
+        _increment('timed_out')
+    except Exception as e:
+        outcome = {'status': 'error', 'error': str(e)}
+        _increment('failed')
+    finally:
+        # Storing the outcome may write to SQLite and runs the completion callback; keep both off the loop
+        await asyncio.to_thread(_finish_job, job_id, user_message, options, outcome, started, timings, on_complete)
+
+
+def dispatch_async_jobs(process_query_async, loop, max_in_flight, on_complete=None):
+    """
+    Move jobs from the queue onto the event loop, keeping at most `max_in_flight` running.
+    Jobs wait in the bounded queue while every slot is taken, so back-pressure is unchanged.
+    """
+    slots = threading.BoundedSemaphore(max_in_flight)
+    while True:
+        job_id, user_message, options, enqueued_at = job_queue.get()
+        slots.acquire()
+        future = asyncio.run_coroutine_threadsafe(
+            _run_async_job(process_query_async, job_id, user_message, options, enqueued_at, on_complete), loop
+        )
+        future.add_done_callback(lambda _: slots.release())
+
 
-def start_worker(process_query):
+def start_worker(process_query, num_workers=None, on_complete=None):
     """
-    Start the background worker thread with the provided `process_query` function.
+    Start the background worker pool with the provided `process_query` function.
+    """
+    num_workers = num_workers or NUM_WORKERS
+    for i in range(num_workers):
+        worker = threading.Thread(
+            target=process_jobs,
+            args=(process_query, on_complete),
+            name=f"query-worker-{i}",
+            daemon=True
+        )
+        worker.start()
+    _register_workers(num_workers)
+
+
+def start_async_worker(process_query_async, loop, max_in_flight=None, on_complete=None):
     """
-    worker = threading.Thread(target=process_jobs, args=(process_query,), daemon=True)
-    worker.start()
\ No newline at end of file
+    Run queued jobs as coroutines on `loop` instead of one thread per job.
+    A single dispatcher thread feeds the loop; `max_in_flight` bounds the concurrent jobs.
+    """
+    max_in_flight = max_in_flight or ASYNC_MAX_IN_FLIGHT
+    dispatcher = threading.Thread(
+        target=dispatch_async_jobs,
+        args=(process_query_async, loop, max_in_flight, on_complete),
+        name="async-dispatcher",
+        daemon=True
+    )
+    dispatcher.start()
+    _register_workers(max_in_flight)
+
+
+def _register_workers(count):
+    global _started_at
+    with _metrics_lock:
+        _metrics['workers'] += count
+        if _started_at is None:
+            _started_at = time.monotonic()
+
+
+def get_queue_metrics():
+    """Return a snapshot of queue depth and worker utilisation."""
+    with _metrics_lock:
+        snapshot = dict(_metrics)
+        busy_seconds = _busy_seconds
+        started_at = _started_at
+
+    workers = snapshot['workers']
+    snapshot['queue_depth'] = job_queue.qsize()
+    snapshot['queue_capacity'] = job_queue.maxsize
+    snapshot['utilisation'] = snapshot['busy_workers'] / workers if workers else 0.0
+    if started_at is not None and workers:
+        elapsed = time.monotonic() - started_at
+        snapshot['average_utilisation'] = min(1.0, busy_seconds / (elapsed * workers)) if elapsed else 0.0
+    else:
+        snapshot['average_utilisation'] = 0.0
+    return snapshot
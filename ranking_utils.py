@@ -0,0 +1,107 @@
+import os
+import re
+import math
+from collections import Counter
+
+# Fast mode ranking configuration
+FAST_LEXICAL_WEIGHT = float(os.getenv('FAST_LEXICAL_WEIGHT', 0.3))  # 0 ranks by vector score only
+FAST_MMR_LAMBDA = float(os.getenv('FAST_MMR_LAMBDA', 0.7))  # 1 disables diversification
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+_TOKEN_RE = re.compile(r"\w+")
+STOPWORDS = frozenset("""
+a an and are as at be but by can do for from has have he her his how i if in is it its me my
+not of on or our she so that the their them they this to us was we what when where which who
+why will with you your
+""".split())
+
+
+def tokenize(text: str) -> list:
+    """Lowercase word tokens with common stopwords removed."""
+    return [t for t in _TOKEN_RE.findall(text.casefold()) if t not in STOPWORDS]
+
+
+def bm25_scores(query_tokens: list, documents: list) -> list:
+    """BM25 score of each tokenized document in `documents` for the query tokens."""
+    if not documents:
+        return []
+    doc_count = len(documents)
+    avg_length = sum(len(d) for d in documents) / doc_count or 1.0
+    doc_freq = Counter(t for d in documents for t in set(d))
+    term_freqs = [Counter(d) for d in documents]
+
+    scores = []
+    for doc, tf in zip(documents, term_freqs):
+        score = 0.0
+        length_norm = BM25_K1 * (1 - BM25_B + BM25_B * len(doc) / avg_length)
+        for term in set(query_tokens):
+            freq = tf.get(term)
+            if not freq:
+                continue
+            idf = math.log(1 + (doc_count - doc_freq[term] + 0.5) / (doc_freq[term] + 0.5))
+            score += idf * freq * (BM25_K1 + 1) / (freq + length_norm)
+        scores.append(score)
+    return scores
+
+
+def _min_max(values: list) -> list:
+    low, high = min(values), max(values)
+    if high - low <= 0:
+        return [1.0 if high > 0 else 0.0 for _ in values]
+    return [(v - low) / (high - low) for v in values]
+
+
+def _redundancy(a: dict, b: dict, tokens_a: set, tokens_b: set) -> float:
+    """How much paragraph `b` repeats `a`: shared talk, shared speaker or shared vocabulary."""
+    if a.get('title') and a.get('title') == b.get('title') and a.get('speaker') == b.get('speaker'):
+        return 0.75
+    overlap = len(tokens_a & tokens_b) / len(tokens_a | tokens_b) if tokens_a or tokens_b else 0.0
+    if a.get('speaker') and a.get('speaker') == b.get('speaker'):
+        return max(0.5, overlap)
+    return overlap
+
+
+def _vector_scores(paragraphs: list) -> list:
+    scores = [p.get('vector_score', p['score']) for p in paragraphs]
+    known = [s for s in scores if s is not None]
+    floor = min(known) if known else 0.0
+    return [floor if s is None else s for s in scores]
+
+
+def rank_paragraphs(query: str, paragraphs: list, top_k: int, lexical_weight: float = FAST_LEXICAL_WEIGHT, mmr_lambda: float = FAST_MMR_LAMBDA) -> list:
+    """
+    Order retrieved paragraphs without an LLM.
+    Relevance blends the vector score with BM25 over the retrieved set, then maximal
+    marginal relevance picks `top_k` paragraphs spread across speakers and talks.
+    Hybrid results carry the fused rank score in `score`, so their `vector_score` is used;
+    lexical-only hits, which have none, get the lowest vector score of the set.
+    """
+    if not paragraphs:
+        return []
+
+    tokens = [tokenize(p['paragraph_text']) for p in paragraphs]
+    relevance = _min_max(_vector_scores(paragraphs))
+    if lexical_weight > 0:
+        lexical = _min_max(bm25_scores(tokenize(query), tokens))
+        relevance = [(1 - lexical_weight) * v + lexical_weight * l for v, l in zip(relevance, lexical)]
+
+    token_sets = [set(t) for t in tokens]
+    remaining = list(range(len(paragraphs)))
+    selected = []
+    while remaining and len(selected) < top_k:
+        def mmr_score(i):
+            if not selected:
+                return relevance[i]
+            redundancy = max(
+                _redundancy(paragraphs[j]['metadata'], paragraphs[i]['metadata'], token_sets[j], token_sets[i])
+                for j in selected
+            )
+            return mmr_lambda * relevance[i] - (1 - mmr_lambda) * redundancy
+
+        best = max(remaining, key=mmr_score)
+        selected.append(best)
+        remaining.remove(best)
+
+    return [paragraphs[i] for i in selected]
@@ -0,0 +1,179 @@
+import os
+import json
+import hashlib
+import argparse
+import logging
+from typing import Iterable
+from ingest import ingest_paragraphs, read_jsonl
+from lexical_index import get_lexical_index
+from metadata_store import get_metadata_store
+from sqlite_utils import SQLiteConnections
+from pinecones_utils_openai import (
+    get_vector_index,
+    paragraph_metadata,
+    stable_paragraph_id,
+    flush_vector_index,
+    NAMESPACE,
+)
+
+logger = logging.getLogger(__name__)
+
+# Manifest configuration
+MANIFEST_PATH = os.getenv("MANIFEST_PATH", "cache/manifest.sqlite3")
+DELETE_BATCH_SIZE = 1000  # Pinecone accepts at most 1000 ids per delete
+
+
+def text_hash(p: dict) -> str:
+    return hashlib.sha256(p.get("paragraph_text", "").encode("utf-8")).hexdigest()
+
+
+def metadata_hash(p: dict) -> str:
+    """Hash of everything stored with the vector except the embedded text."""
+    metadata = paragraph_metadata(p)
+    metadata.pop("paragraph_text", None)
+    return hashlib.sha256(json.dumps(metadata, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class Manifest:
+    """
+    SQLite record of what is currently indexed: one `(id, text_hash, metadata_hash)` row per paragraph.
+    """
+
+    def __init__(self, path: str = MANIFEST_PATH):
+        self.path = path
+        self._db = SQLiteConnections(path)
+        conn = self._db.connection()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS paragraphs ("
+            "id TEXT PRIMARY KEY, text_hash TEXT NOT NULL, metadata_hash TEXT NOT NULL)"
+        )
+        conn.commit()
+
+    def entries(self) -> dict:
+        """Return `{id: (text_hash, metadata_hash)}` for every indexed paragraph."""
+        rows = self._db.connection().execute("SELECT id, text_hash, metadata_hash FROM paragraphs").fetchall()
+        return {row[0]: (row[1], row[2]) for row in rows}
+
+    def put_many(self, rows) -> None:
+        conn = self._db.connection()
+        conn.executemany(
+            "INSERT OR REPLACE INTO paragraphs (id, text_hash, metadata_hash) VALUES (?, ?, ?)", list(rows)
+        )
+        conn.commit()
+
+    def remove_many(self, ids) -> None:
+        conn = self._db.connection()
+        conn.executemany("DELETE FROM paragraphs WHERE id = ?", [(i,) for i in ids])
+        conn.commit()
+
+    def close(self) -> None:
+        self._db.close()
+
+
+def plan_sync(paragraphs: Iterable[dict], manifest: Manifest) -> dict:
+    """
+    Compare a corpus with the manifest.
+    Returns the paragraphs whose text is new or changed, those whose metadata alone changed,
+    the manifest ids missing from the corpus, and the manifest rows to write afterwards.
+    """
+    known = manifest.entries()
+    seen = set()
+    plan = {"embed": [], "metadata": [], "delete": [], "rows": [], "unchanged": 0}
+    for p in paragraphs:
+        paragraph_id = p.get("id") or stable_paragraph_id(p)
+        if paragraph_id in seen:
+            logger.warning(f"Duplicate paragraph id {paragraph_id}, keeping the first occurrence")
+            continue
+        seen.add(paragraph_id)
+        hashes = (text_hash(p), metadata_hash(p))
+        previous = known.get(paragraph_id)
+        if previous == hashes:
+            plan["unchanged"] += 1
+            continue
+        if previous is not None and previous[0] == hashes[0]:
+            plan["metadata"].append((paragraph_id, p))
+        else:
+            plan["embed"].append(dict(p, id=paragraph_id))
+        plan["rows"].append((paragraph_id, *hashes))
+    plan["delete"] = [paragraph_id for paragraph_id in known if paragraph_id not in seen]
+    plan["seen"] = seen
+    return plan
+
+
+def delete_vectors(index, ids: list) -> None:
+    for i in range(0, len(ids), DELETE_BATCH_SIZE):
+        index.delete(ids=ids[i:i + DELETE_BATCH_SIZE], namespace=NAMESPACE)
+
+
+def sync_paragraphs(paragraphs: Iterable[dict], manifest_path: str = MANIFEST_PATH, prune_unknown: bool = False, dry_run: bool = False) -> dict:
+    """
+    Bring the vector index, lexical index and metadata store in line with a corpus, paying only for what changed.
+    New or edited text is embedded and upserted, metadata-only edits are applied in place, and
+    paragraphs that disappeared from the corpus are deleted. With `prune_unknown`, vectors in the
+    namespace that were never recorded in the manifest (e.g. old positional `p{i}` ids) are deleted too.
+    Returns counts of each kind of change.
+    """
+    manifest = Manifest(manifest_path)
+    try:
+        plan = plan_sync(paragraphs, manifest)
+        index = get_vector_index()
+        if prune_unknown:
+            recorded = set(manifest.entries())
+            for page in index.list(namespace=NAMESPACE):
+                plan["delete"].extend(
+                    vector_id for vector_id in page if vector_id not in plan["seen"] and vector_id not in recorded
+                )
+        summary = {
+            "embedded": len(plan["embed"]),
+            "metadata_updated": len(plan["metadata"]),
+            "deleted": len(plan["delete"]),
+            "unchanged": plan["unchanged"],
+        }
+        logger.info(f"Sync plan: {summary}")
+        if dry_run:
+            return summary
+
+        lexical_index = get_lexical_index()
+        metadata_store = get_metadata_store()
+        if plan["embed"]:
+            ingest_paragraphs(plan["embed"])
+
+        if plan["metadata"]:
+            records = [(paragraph_id, paragraph_metadata(p)) for paragraph_id, p in plan["metadata"]]
+            for paragraph_id, metadata in records:
+                index.update(id=paragraph_id, set_metadata=metadata, namespace=NAMESPACE)
+            if metadata_store is not None:
+                metadata_store.put_many(records)
+            lexical_index.add_many(records)
+
+        if plan["delete"]:
+            delete_vectors(index, plan["delete"])
+            lexical_index.remove_many(plan["delete"])
+            if metadata_store is not None:
+                metadata_store.remove_many(plan["delete"])
+
+        # Record the new state only once the indexes hold it
+        flush_vector_index(index)
+        lexical_index.save()
+        manifest.put_many(plan["rows"])
+        manifest.remove_many(plan["delete"])
+        logger.info(f"Sync complete: {summary}")
+        return summary
+    finally:
+        manifest.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sync the indexes with a JSON Lines corpus, embedding only new or changed paragraphs.")
+    parser.add_argument("path", help="JSONL file with one paragraph object per line")
+    parser.add_argument("--manifest", default=MANIFEST_PATH, help=f"Manifest file (default: {MANIFEST_PATH})")
+    parser.add_argument("--prune-unknown", action="store_true", help="Also delete vectors the manifest has never seen")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would change without changing anything")
+    args = parser.parse_args()
+
+    summary = sync_paragraphs(read_jsonl(args.path), args.manifest, args.prune_unknown, args.dry_run)
+    print(json.dumps(summary))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+import os
+import time
+import asyncio
+import random
+import threading
+
+# Pipeline-wide limits
+PIPELINE_DEADLINE = float(os.getenv('PIPELINE_DEADLINE', 90))
+PIPELINE_RETRY_BUDGET = int(os.getenv('PIPELINE_RETRY_BUDGET', 3))
+
+
+class RetryPolicy:
+    """
+    How a pipeline stage is retried: attempt limit and capped exponential backoff with full jitter.
+    """
+
+    def __init__(self, max_attempts=3, base_delay=0.5, max_delay=8.0, retry_on=(Exception,)):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_on = retry_on
+
+    def backoff(self, attempt):
+        """Seconds to wait after the given (zero-based) failed attempt."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+
+class Deadline:
+    """Wall-clock limit shared by every stage of one pipeline run."""
+
+    def __init__(self, seconds=PIPELINE_DEADLINE):
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self):
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self):
+        return self.remaining() <= 0
+
+
+class RetryBudget:
+    """Caps the total number of retries across all stages of one pipeline run."""
+
+    def __init__(self, max_retries=PIPELINE_RETRY_BUDGET):
+        self.remaining = max_retries
+        self._lock = threading.Lock()
+
+    def spend(self):
+        """Use one retry; returns False once the budget is exhausted."""
+        with self._lock:
+            if self.remaining <= 0:
+                return False
+            self.remaining -= 1
+            return True
+
+
+def run_stage(name, func, policy, deadline=None, budget=None, timings=None):
+    """
+    Run one pipeline stage, retrying failures according to `policy`.
+    Stops early when the deadline would pass during the backoff or the retry budget is spent.
+    Records the stage's total duration and attempt count in `timings`.
+    """
+    started = time.monotonic()
+    attempts = 0
+    try:
+        while True:
+            attempts += 1
+            try:
+                return func()
+            except policy.retry_on as e:
+                print(f"[ERROR] Stage '{name}' attempt {attempts} failed: {e}")
+                if attempts >= policy.max_attempts:
+                    raise
+                delay = policy.backoff(attempts - 1)
+                if deadline is not None and deadline.remaining() <= delay:
+                    print(f"[ERROR] Stage '{name}' has no time left before the pipeline deadline")
+                    raise
+                if budget is not None and not budget.spend():
+                    print(f"[ERROR] Stage '{name}' cannot retry, pipeline retry budget is spent")
+                    raise
+                time.sleep(delay)
+    finally:
+        if timings is not None:
+            timings[name] = round(time.monotonic() - started, 4)
+            timings[f"{name}_attempts"] = attempts
+
+
+async def run_stage_async(name, func, policy, deadline=None, budget=None, timings=None):
+    """
+    Async counterpart of `run_stage`: `func` returns a fresh awaitable for each attempt.
+    """
+    started = time.monotonic()
+    attempts = 0
+    try:
+        while True:
+            attempts += 1
+            try:
+                return await func()
+            except policy.retry_on as e:
+                print(f"[ERROR] Stage '{name}' attempt {attempts} failed: {e}")
+                if attempts >= policy.max_attempts:
+                    raise
+                delay = policy.backoff(attempts - 1)
+                if deadline is not None and deadline.remaining() <= delay:
+                    print(f"[ERROR] Stage '{name}' has no time left before the pipeline deadline")
+                    raise
+                if budget is not None and not budget.spend():
+                    print(f"[ERROR] Stage '{name}' cannot retry, pipeline retry budget is spent")
+                    raise
+                await asyncio.sleep(delay)
+    finally:
+        if timings is not None:
+            timings[name] = round(time.monotonic() - started, 4)
+            timings[f"{name}_attempts"] = attempts
@@ -0,0 +1,118 @@
+import os
+import json
+import time
+import threading
+from collections import OrderedDict
+import numpy as np
+
+# Semantic cache configuration
+SEMANTIC_CACHE = os.getenv('SEMANTIC_CACHE', '1') == '1'
+SEMANTIC_CACHE_MAX_SIZE = int(os.getenv('SEMANTIC_CACHE_MAX_SIZE', 1000))
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv('SEMANTIC_CACHE_THRESHOLD', 0.88))
+SEMANTIC_CACHE_TTL = float(os.getenv('SEMANTIC_CACHE_TTL', 30 * 60))
+
+
+class SemanticCache:
+    """
+    Verified results keyed by query embedding, so paraphrases of a cached question are
+    answered without retrieval or the LLM. Embeddings are kept unit-normalized in one
+    float32 matrix and a lookup is a single matrix-vector product; the most similar entry
+    with the same `top_k` and filters is a hit when its cosine similarity reaches `threshold`.
+    Entries expire after `ttl` seconds and the least recently used are evicted beyond `max_size`.
+    """
+
+    def __init__(self, max_size=SEMANTIC_CACHE_MAX_SIZE, threshold=SEMANTIC_CACHE_THRESHOLD, ttl=SEMANTIC_CACHE_TTL, enabled=SEMANTIC_CACHE):
+        self.max_size = max_size
+        self.threshold = threshold
+        self.ttl = ttl
+        self.enabled = enabled and max_size > 0
+        self._vectors = None  # Allocated on the first insert, when the dimension is known
+        self._scopes = np.full(max_size, -1, dtype=np.int64)
+        self._stored_at = np.zeros(max_size, dtype=np.float64)
+        self._results = [None] * max_size
+        self._slots = OrderedDict()  # Occupied slots in LRU order
+        self._scope_ids = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _scope_id(self, top_k, filters):
+        scope = f"{top_k}_{json.dumps(filters or {}, sort_keys=True)}"
+        return self._scope_ids.setdefault(scope, len(self._scope_ids))
+
+    @staticmethod
+    def _normalize(embedding):
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _nearest(self, vector, scope_id):
+        """Return `(slot, similarity)` of the closest live entry in the scope, or `(None, -1.0)`."""
+        if not self._slots or self._vectors is None or self._vectors.shape[1] != vector.shape[0]:
+            return None, -1.0
+        live = (self._scopes == scope_id) & (time.monotonic() - self._stored_at < self.ttl)
+        if not live.any():
+            return None, -1.0
+        similarities = self._vectors @ vector
+        similarities[~live] = -np.inf
+        slot = int(np.argmax(similarities))
+        return slot, float(similarities[slot])
+
+    def get(self, embedding, top_k, filters=None):
+        """Return the results cached for the most similar query, or None below the threshold."""
+        if not self.enabled:
+            return None
+        vector = self._normalize(embedding)
+        with self._lock:
+            slot, similarity = self._nearest(vector, self._scope_id(top_k, filters))
+            if slot is not None and similarity >= self.threshold:
+                self._slots.move_to_end(slot)
+                self.hits += 1
+                return self._results[slot]
+            self.misses += 1
+            return None
+
+    def set(self, embedding, top_k, results, filters=None):
+        """Store results; a cached query within the threshold is replaced instead of duplicated."""
+        if not self.enabled:
+            return
+        vector = self._normalize(embedding)
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = np.zeros((self.max_size, vector.shape[0]), dtype=np.float32)
+            scope_id = self._scope_id(top_k, filters)
+            slot, similarity = self._nearest(vector, scope_id)
+            if slot is None or similarity < self.threshold:
+                slot = self._free_slot()
+            self._vectors[slot] = vector
+            self._scopes[slot] = scope_id
+            self._stored_at[slot] = time.monotonic()
+            self._results[slot] = results
+            self._slots[slot] = True
+            self._slots.move_to_end(slot)
+
+    def _free_slot(self):
+        if len(self._slots) < self.max_size:
+            return len(self._slots)
+        # Reuse an expired slot before evicting the least recently used one
+        expired = np.flatnonzero(time.monotonic() - self._stored_at >= self.ttl)
+        slot = int(expired[0]) if len(expired) else next(iter(self._slots))
+        del self._slots[slot]
+        self.evictions += 1
+        return slot
+
+    def stats(self):
+        """Return hit/miss counters and current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'enabled': self.enabled,
+                'size': len(self._slots),
+                'max_size': self.max_size,
+                'threshold': self.threshold,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+            }
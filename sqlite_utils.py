@@ -0,0 +1,39 @@
+import os
+import sqlite3
+import threading
+
+
+class SQLiteConnections:
+    """
+    One connection per thread to a SQLite file, shared by the local stores.
+    The file uses WAL journaling, so readers never wait for a writer, and `synchronous=NORMAL`,
+    which stays crash-safe under WAL. SQLite handles locking between threads and processes.
+    """
+
+    def __init__(self, path: str, timeout: float = 10, pragmas: dict = None):
+        self.path = path
+        self.timeout = timeout
+        self.pragmas = dict(pragmas or {}, synchronous="NORMAL")
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # The journal mode is stored in the file, so setting it once covers every connection
+        self.connection().execute("PRAGMA journal_mode=WAL")
+
+    def connection(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout)
+            for name, value in self.pragmas.items():
+                conn.execute(f"PRAGMA {name}={value}")
+            self._local.conn = conn
+        return conn
+
+    def close(self) -> None:
+        """Close this thread's connection, if it has one."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
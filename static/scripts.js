@@ -79,7 +79,8 @@ function setupSearchForm() {
 
 function setupActionButtons() {
   document.getElementById("loadMoreButton").addEventListener("click", () => {
-    displayedCount = allQuotes.length;
+    // Infinity also shows quotes that are still streaming in
+    displayedCount = Infinity;
     renderQuotes();
     hideLoadMoreButton();
   });
@@ -122,7 +123,8 @@ function handleSearch(event) {
   }
 
   // Submit query without clearing the input field
-  submitQuery(query);
+  const fastMode = document.getElementById("fastMode");
+  submitQuery(query, fastMode && fastMode.checked ? "fast" : "llm");
 }
 
 function setLoadingState(isLoading, elements) {
@@ -132,7 +134,99 @@ function setLoadingState(isLoading, elements) {
   }
 }
 
-function submitQuery(query) {
+function submitQuery(query, mode = "llm") {
+  // Stream results when the browser supports Server-Sent Events, otherwise poll
+  if (window.EventSource) {
+    streamQuery(query, mode);
+  } else {
+    postQuery(query, mode);
+  }
+}
+
+function streamQuery(query, mode) {
+  const loadingSpinner = document.querySelector("#loading-spinner");
+  const resultsContainer = document.querySelector("#responseContainer");
+
+  allQuotes = [];
+  displayedCount = 5;
+  loadingSpinner.style.display = "block";
+  resultsContainer.innerHTML =
+    '<p id="progress-message">Searching through conference talks...</p>';
+  resultsContainer.style.display = "block";
+
+  const source = new EventSource(
+    `/stream?question=${encodeURIComponent(query)}&mode=${mode}`
+  );
+
+  source.addEventListener("paragraphs", (event) => {
+    const paragraphs = JSON.parse(event.data);
+    setProgressMessage(
+      `Found ${paragraphs.length} relevant paragraphs. Selecting quotes...`
+    );
+  });
+
+  source.addEventListener("quote", (event) => {
+    appendQuote(JSON.parse(event.data));
+  });
+
+  source.addEventListener("done", () => {
+    source.close();
+    finishStream();
+  });
+
+  // Fired for server-sent error events (with data) and for dropped connections
+  source.addEventListener("error", (event) => {
+    source.close();
+    const message = event.data
+      ? JSON.parse(event.data).error
+      : "The connection was interrupted. Please try again.";
+    loadingSpinner.style.display = "none";
+    document.getElementById("loadingIndicator").style.display = "none";
+    if (allQuotes.length > 0) {
+      showActionButtons();
+    } else {
+      resultsContainer.innerHTML = `<p class="error">Error: ${message}</p>`;
+    }
+  });
+}
+
+function setProgressMessage(message) {
+  const progress = document.querySelector("#progress-message");
+  if (progress) progress.textContent = message;
+}
+
+// Render a single streamed quote without re-rendering earlier cards
+function appendQuote(quote) {
+  const container = document.getElementById("responseContainer");
+  const progress = document.querySelector("#progress-message");
+  if (progress) progress.remove();
+
+  quote.index = allQuotes.length;
+  allQuotes.push(quote);
+
+  if (quote.index < displayedCount) {
+    container.insertAdjacentHTML("beforeend", validateAndRenderQuote(quote));
+    setupPlayer(quote.index);
+  }
+  if (quote.index === 0 || quote.index === displayedCount) {
+    showActionButtons();
+  }
+}
+
+function finishStream() {
+  document.querySelector("#loading-spinner").style.display = "none";
+  document.getElementById("loadingIndicator").style.display = "none";
+
+  displayedCount = Math.min(displayedCount, allQuotes.length);
+  if (allQuotes.length > 0) {
+    showActionButtons();
+    if (displayedCount >= allQuotes.length) hideLoadMoreButton();
+  } else {
+    showNoResultsMessage();
+  }
+}
+
+function postQuery(query, mode) {
   const loadingSpinner = document.querySelector("#loading-spinner");
   const resultsContainer = document.querySelector("#responseContainer");
 
@@ -142,7 +236,7 @@ function submitQuery(query) {
   fetch("/query", {
     method: "POST",
     headers: { "Content-Type": "application/json" },
-    body: JSON.stringify({ question: query }),
+    body: JSON.stringify({ question: query, mode: mode }),
   })
     .then((response) => response.json())
     .then((data) => {
@@ -268,7 +362,7 @@ function generateQuoteCard(quote) {
         <p><strong>Title:</strong> ${quote.title}</p>
         <p><strong>Session:</strong> ${session}</p>
       </div>
-      <p class="quote-text">${quote.paragraph_text}</p>
+      <p class="quote-text">${highlightText(quote.paragraph_text, quote.highlight)}</p>
       <div class="quote-actions">
         <button onclick="window.open('${
           quote.paragraph_deep_link
@@ -289,6 +383,18 @@ function generateQuoteCard(quote) {
   `;
 }
 
+// Mark the sentence picked by the search when it appears verbatim in the paragraph
+function highlightText(text, highlight) {
+  if (!highlight) return text;
+  const start = text.toLowerCase().indexOf(highlight.toLowerCase());
+  if (start === -1) return text;
+  const end = start + highlight.length;
+  return `${text.slice(0, start)}<mark class="quote-highlight">${text.slice(
+    start,
+    end
+  )}</mark>${text.slice(end)}`;
+}
+
 // 2) Give each iframe a unique ID using the index
 function generateVideoEmbed(videoId, index) {
   return `
@@ -361,6 +467,13 @@ function setupPlayers() {
   });
 }
 
+// Create a YT.Player for one streamed quote, if the YT API has loaded
+function setupPlayer(index) {
+  const iframe = document.getElementById(`player-${index}`);
+  if (!iframe || !window.YT || !YT.Player) return;
+  players[index] = new YT.Player(iframe.id, { events: {} });
+}
+
 // 4) Seek to the correct time and play
 function replayQuote(index, startTime) {
   const player = players[index];
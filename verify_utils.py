@@ -0,0 +1,98 @@
+import os
+import re
+import threading
+from collections import OrderedDict, namedtuple
+
+# Verification configuration
+SHINGLE_SIZE = int(os.getenv('VERIFY_SHINGLE_SIZE', 4))
+MIN_CONTAINMENT = float(os.getenv('VERIFY_MIN_CONTAINMENT', 0.8))
+MIN_SUBSTRING_CHARS = int(os.getenv('VERIFY_MIN_SUBSTRING_CHARS', 30))
+NORMALIZED_CACHE_SIZE = int(os.getenv('VERIFY_NORMALIZED_CACHE_SIZE', 20000))
+
+_NON_WORD_RE = re.compile(r"[^\w\s]+")
+
+NormalizedParagraph = namedtuple("NormalizedParagraph", ["raw_text", "text", "shingles"])
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, drop punctuation (including curly quotes) and collapse whitespace."""
+    return " ".join(_NON_WORD_RE.sub(" ", text.casefold()).split())
+
+
+def shingles(normalized: str, size: int = SHINGLE_SIZE) -> frozenset:
+    """Word n-grams of a normalized text; short texts yield a single shingle."""
+    words = normalized.split()
+    if len(words) <= size:
+        return frozenset([" ".join(words)]) if words else frozenset()
+    return frozenset(" ".join(words[i:i + size]) for i in range(len(words) - size + 1))
+
+
+# Normalized forms are computed once per corpus paragraph and reused across queries
+_normalized_cache = OrderedDict()
+_normalized_cache_lock = threading.Lock()
+
+
+def normalize_paragraph(paragraph_id: str, text: str) -> NormalizedParagraph:
+    """Return the cached normalized form of a paragraph, computing it on first sight."""
+    with _normalized_cache_lock:
+        cached = _normalized_cache.get(paragraph_id)
+        if cached is not None and cached.raw_text == text:
+            _normalized_cache.move_to_end(paragraph_id)
+            return cached
+
+    normalized = normalize_text(text)
+    entry = NormalizedParagraph(text, normalized, shingles(normalized))
+    with _normalized_cache_lock:
+        _normalized_cache[paragraph_id] = entry
+        while len(_normalized_cache) > NORMALIZED_CACHE_SIZE:
+            _normalized_cache.popitem(last=False)
+    return entry
+
+
+class QuoteVerifier:
+    """
+    Maps quotes returned by the LLM back to the retrieved paragraphs they came from.
+    A quote matches a paragraph when the normalized texts are equal, when the quote is a
+    substring of the paragraph, or when most of the quote's word shingles occur in it.
+    """
+
+    def __init__(self, paragraphs, min_containment=MIN_CONTAINMENT):
+        self.paragraphs = paragraphs
+        self.min_containment = min_containment
+        self._normalized = []
+        self._exact = {}
+        self._shingle_index = {}
+
+        for position, p in enumerate(paragraphs):
+            text = p['metadata']['paragraph_text']
+            entry = normalize_paragraph(p.get('id') or text, text)
+            self._normalized.append(entry)
+            self._exact.setdefault(entry.text, position)
+            for shingle in entry.shingles:
+                self._shingle_index.setdefault(shingle, []).append(position)
+
+    def match(self, quote_text: str):
+        """Return the retrieved paragraph that `quote_text` was taken from, or None."""
+        normalized = normalize_text(quote_text)
+        if not normalized:
+            return None
+
+        position = self._exact.get(normalized)
+        if position is not None:
+            return self.paragraphs[position]
+
+        if len(normalized) >= MIN_SUBSTRING_CHARS:
+            for position, entry in enumerate(self._normalized):
+                if normalized in entry.text:
+                    return self.paragraphs[position]
+
+        quote_shingles = shingles(normalized)
+        overlap = {}
+        for shingle in quote_shingles:
+            for position in self._shingle_index.get(shingle, ()):
+                overlap[position] = overlap.get(position, 0) + 1
+        if overlap:
+            position, count = max(overlap.items(), key=lambda item: item[1])
+            if count / len(quote_shingles) >= self.min_containment:
+                return self.paragraphs[position]
+        return None
@@ -0,0 +1,229 @@
+import os
+import json
+import time
+import uuid
+import threading
+import logging
+from collections import Counter
+from cache_utils import normalize_query
+from sqlite_utils import SQLiteConnections
+
+logger = logging.getLogger(__name__)
+
+# Warm cache configuration
+WARM_CACHE = os.getenv("WARM_CACHE", "1") == "1"
+WARM_CACHE_PATH = os.getenv("WARM_CACHE_PATH", "cache/warm_cache.sqlite3")
+WARM_CACHE_TOP_N = int(os.getenv("WARM_CACHE_TOP_N", 50))
+WARM_CACHE_MIN_COUNT = float(os.getenv("WARM_CACHE_MIN_COUNT", 3))
+WARM_CACHE_INTERVAL = float(os.getenv("WARM_CACHE_INTERVAL", 6 * 60 * 60))  # Seconds between refreshes
+WARM_CACHE_MAX_AGE = float(os.getenv("WARM_CACHE_MAX_AGE", 24 * 60 * 60))  # Oldest answer loaded at startup
+WARM_CACHE_DECAY = 0.8  # Query counts are multiplied by this every refresh, so old favourites fade
+WARM_CACHE_IDLE_WAIT = 1.0  # Seconds to back off while user queries are waiting
+WARM_CACHE_FLUSH_INTERVAL = 60  # Seconds between writes of the query counts
+WARM_CACHE_LEASE = 3 * WARM_CACHE_FLUSH_INTERVAL  # Seconds one process may refresh before another can take over
+WARM_CACHE_MIN_LOGGED_COUNT = 0.5  # Decayed queries below this count are dropped from the log
+
+
+def _filters_json(filters) -> str:
+    return json.dumps(filters or {}, sort_keys=True)
+
+
+class WarmCache:
+    """
+    Query frequencies and precomputed answers for popular questions, kept in SQLite so they
+    survive restarts. Queries are counted in memory and written out every minute;
+    questions are grouped by their normalized form and filters. Processes sharing the file
+    elect one refresher with a lease, so counts decay and answers are computed only once.
+    """
+
+    def __init__(self, path: str = WARM_CACHE_PATH):
+        self.path = path
+        self._db = SQLiteConnections(path)
+        self._counts = Counter()
+        self._queries = {}  # key -> (question as first asked, filters)
+        self._lock = threading.Lock()
+        self.precomputed = 0
+        self.loaded = 0
+        conn = self._db.connection()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS query_log ("
+            "key TEXT PRIMARY KEY, query TEXT NOT NULL, filters TEXT NOT NULL, count REAL NOT NULL, last_seen REAL NOT NULL)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS answers ("
+            "key TEXT PRIMARY KEY, query TEXT NOT NULL, filters TEXT NOT NULL, results TEXT NOT NULL, computed_at REAL NOT NULL)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS refresher ("
+            "id INTEGER PRIMARY KEY CHECK (id = 1), owner TEXT NOT NULL, expires_at REAL NOT NULL, refreshed_at REAL NOT NULL)"
+        )
+        conn.commit()
+
+    @staticmethod
+    def make_key(query, filters=None) -> str:
+        return f"{normalize_query(query)}_{_filters_json(filters)}"
+
+    def record(self, query, filters=None) -> None:
+        """Count one occurrence of a question; cheap enough for the request path."""
+        key = self.make_key(query, filters)
+        with self._lock:
+            self._counts[key] += 1
+            self._queries.setdefault(key, (query, filters or {}))
+
+    def flush_counts(self) -> None:
+        """Add the queries counted since the last flush to the log on disk."""
+        with self._lock:
+            counts, self._counts = self._counts, Counter()
+            queries, self._queries = self._queries, {}
+        if not counts:
+            return
+        now = time.time()
+        conn = self._db.connection()
+        with conn:
+            conn.executemany(
+                "INSERT INTO query_log (key, query, filters, count, last_seen) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET count = count + excluded.count, last_seen = excluded.last_seen",
+                [(key, queries[key][0], _filters_json(queries[key][1]), count, now) for key, count in counts.items()]
+            )
+
+    def decay_counts(self, decay: float = WARM_CACHE_DECAY, max_age: float = WARM_CACHE_MAX_AGE) -> None:
+        """
+        Scale every logged count by `decay` so old favourites fade, dropping the queries that have
+        faded below WARM_CACHE_MIN_LOGGED_COUNT and the answers too old to be loaded again.
+        """
+        conn = self._db.connection()
+        with conn:
+            conn.execute("UPDATE query_log SET count = count * ?", (decay,))
+            conn.execute("DELETE FROM query_log WHERE count < ?", (WARM_CACHE_MIN_LOGGED_COUNT,))
+            conn.execute("DELETE FROM answers WHERE computed_at < ?", (time.time() - max_age,))
+
+    def acquire_lease(self, owner: str, duration: float = WARM_CACHE_LEASE) -> bool:
+        """Take or renew the refresher lease for `duration` seconds; False while another process holds it."""
+        now = time.time()
+        conn = self._db.connection()
+        with conn:
+            cursor = conn.execute(
+                "INSERT INTO refresher (id, owner, expires_at, refreshed_at) VALUES (1, ?, ?, 0) "
+                "ON CONFLICT (id) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at "
+                "WHERE refresher.owner = excluded.owner OR refresher.expires_at < ?",
+                (owner, now + duration, now)
+            )
+        return cursor.rowcount > 0
+
+    def last_refresh(self) -> float:
+        """Wall-clock time of the last refresh by any process, or 0."""
+        row = self._db.connection().execute("SELECT refreshed_at FROM refresher WHERE id = 1").fetchone()
+        return row[0] if row else 0.0
+
+    def mark_refreshed(self, owner: str) -> None:
+        conn = self._db.connection()
+        with conn:
+            conn.execute("UPDATE refresher SET refreshed_at = ? WHERE id = 1 AND owner = ?", (time.time(), owner))
+
+    def stale_popular(self, top_n: int = WARM_CACHE_TOP_N, min_count: float = WARM_CACHE_MIN_COUNT, max_age: float = WARM_CACHE_INTERVAL):
+        """The `top_n` most asked questions whose answer is missing or older than `max_age` seconds."""
+        rows = self._db.connection().execute(
+            "SELECT q.query, q.filters FROM (SELECT * FROM query_log WHERE count >= ? ORDER BY count DESC LIMIT ?) q "
+            "LEFT JOIN answers a ON a.key = q.key WHERE a.computed_at IS NULL OR a.computed_at < ? ORDER BY q.count DESC",
+            (min_count, top_n, time.time() - max_age)
+        ).fetchall()
+        return [(query, json.loads(filters)) for query, filters in rows]
+
+    def save(self, query, filters, results) -> None:
+        conn = self._db.connection()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO answers (key, query, filters, results, computed_at) VALUES (?, ?, ?, ?, ?)",
+                (self.make_key(query, filters), query, _filters_json(filters), json.dumps(results), time.time())
+            )
+        self.precomputed += 1
+
+    def load(self, max_age: float = WARM_CACHE_MAX_AGE, since: float = 0.0):
+        """
+        Return `(query, filters, results, age)` for every saved answer younger than `max_age` seconds,
+        or only for those computed after the wall-clock time `since`.
+        """
+        now = time.time()
+        rows = self._db.connection().execute(
+            "SELECT query, filters, results, computed_at FROM answers WHERE computed_at > ?", (max(now - max_age, since),)
+        ).fetchall()
+        self.loaded += len(rows)
+        return [(query, json.loads(filters), json.loads(results), now - computed_at) for query, filters, results, computed_at in rows]
+
+    def stats(self) -> dict:
+        conn = self._db.connection()
+        with self._lock:
+            pending = len(self._counts)
+        return {
+            "logged_queries": conn.execute("SELECT COUNT(*) FROM query_log").fetchone()[0] + pending,
+            "answers": conn.execute("SELECT COUNT(*) FROM answers").fetchone()[0],
+            "loaded": self.loaded,
+            "precomputed": self.precomputed,
+        }
+
+
+def refresh_warm_cache(warm_cache, compute, on_result, is_busy, interval=WARM_CACHE_INTERVAL):
+    """
+    Background refresher. Query counts are written every minute. The process holding the
+    refresher lease also, once every `interval` seconds across all processes (and right away on
+    a new cache file), decays the counts and precomputes answers for the most popular questions
+    one at a time. Each question waits until `is_busy()` is false, so user queries always go
+    first. `compute(query, filters)` returns the results, and `on_result(query, filters, results)`
+    publishes them; every process also publishes the answers saved by the others.
+    """
+    owner = uuid.uuid4().hex
+    lease_until = 0.0
+    synced_at = time.time()  # Answers saved before this were loaded at startup
+
+    def hold_lease():
+        # Renew once half the lease has passed, so a long precompute keeps it
+        nonlocal lease_until
+        if time.monotonic() < lease_until - WARM_CACHE_LEASE / 2:
+            return True
+        if not warm_cache.acquire_lease(owner):
+            lease_until = 0.0
+            return False
+        lease_until = time.monotonic() + WARM_CACHE_LEASE
+        return True
+
+    while True:
+        try:
+            warm_cache.flush_counts()
+            if hold_lease() and time.time() - warm_cache.last_refresh() >= interval:
+                warm_cache.mark_refreshed(owner)
+                warm_cache.decay_counts()
+                popular = warm_cache.stale_popular(max_age=interval)
+                if popular:
+                    logger.info(f"Warm cache: precomputing {len(popular)} popular questions")
+                for query, filters in popular:
+                    while is_busy():
+                        time.sleep(WARM_CACHE_IDLE_WAIT)
+                    if not hold_lease():
+                        logger.info("Warm cache: refresher lease taken over by another process")
+                        break
+                    try:
+                        results = compute(query, filters)
+                    except Exception as e:
+                        logger.warning(f"Warm cache: precomputing '{query[:50]}' failed: {e}")
+                        continue
+                    if results:
+                        warm_cache.save(query, filters, results)
+                        on_result(query, filters, results)
+            now = time.time()
+            for query, filters, results, _ in warm_cache.load(since=synced_at):
+                on_result(query, filters, results)
+            synced_at = now
+        except Exception as e:
+            logger.error(f"Warm cache refresh failed: {e}")
+        time.sleep(WARM_CACHE_FLUSH_INTERVAL)
+
+
+def start_warm_cache_refresher(warm_cache, compute, on_result, is_busy, interval=WARM_CACHE_INTERVAL):
+    refresher = threading.Thread(
+        target=refresh_warm_cache,
+        args=(warm_cache, compute, on_result, is_busy, interval),
+        name="warm-cache",
+        daemon=True
+    )
+    refresher.start()
+    return refresher